@@ -3,8 +3,10 @@ from discord.ext import commands
 from discord import app_commands
 from logger_config import setup_logger
 from utils.db import (
-    get_balance, update_balance, get_user_top
+    get_balance, transfer, get_user_top
 )
+from utils.ratelimit import rate_limit
+from utils.locks import lock_accounts
 
 logger = setup_logger()
 
@@ -49,6 +51,7 @@ class Economy(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="pay", description="Передать Лоресики другому пользователю")
+    @rate_limit()
     async def pay(self, interaction: discord.Interaction, получатель: discord.Member, колво: int):
         logger.info(f"💳 /pay | От: {interaction.user} ({interaction.user.id}) | Кому: {получатель} ({получатель.id}) | Сумма: {колво}")
         
@@ -64,16 +67,17 @@ class Economy(commands.Cog):
         guild_id = interaction.guild.id
         sender_id = interaction.user.id
         
-        sender_balance = await get_balance(sender_id, guild_id)
+        async with lock_accounts(guild_id, sender_id, получатель.id):
+            result = await transfer(sender_id, получатель.id, guild_id, колво)
         
-        if sender_balance < колво:
+        if result is None:
+            sender_balance = await get_balance(sender_id, guild_id)
             return await interaction.response.send_message(
                 f"❌ Недостаточно средств! Ваш баланс: `{sender_balance}` Лоресиков.", 
                 ephemeral=True
             )
 
-        await update_balance(sender_id, guild_id, -колво)
-        await update_balance(получатель.id, guild_id, колво)
+        sender_balance, _ = result
 
         embed = discord.Embed(
             title="💸 Успешный перевод",
@@ -81,6 +85,7 @@ class Economy(commands.Cog):
             color=discord.Color.gold()
         )
         embed.add_field(name="Сумма", value=f"`{колво}` Лоресиков", inline=True)
+        embed.add_field(name="Баланс отправителя", value=f"`{sender_balance}` Лоресиков", inline=True)
         embed.set_footer(text=f"ID отправителя: {sender_id}")
 
         await interaction.response.send_message(content=f"{получатель.mention}, вам подарок!", embed=embed)
@@ -1,43 +1,65 @@
 import discord
-import json
 from discord.ext import commands
 from discord import app_commands
 from logger_config import setup_logger
 from utils.db import (
-    load_events_from_db, save_event, delete_event, 
-    get_event_bets, place_bet, get_balance, update_balance
+    load_guild_events, allocate_event_id, get_event_list, save_event,
+    set_event_locked, settle_event, pool_coefficient,
+    place_bet, get_balance, update_balance
 )
+from utils.ratelimit import rate_limit
+from utils.locks import lock_account
+from utils.cache import LRUCache
+from config import PARI_MUTUEL_RAKE, EVENT_GUILD_CACHE_SIZE
 
 logger = setup_logger()
 
-active_events = {}
+# --- ТОТАЛИЗАТОР ---
+# event["pools"][вариант] = (сумма ставок, ставок, игроков) — ведётся в
+# place_bet и в памяти, поэтому живой кэф считается по вариантам события,
+# без чтения таблицы bets.
+
+def pool_total(event):
+    return sum(stake for stake, _, _ in event["pools"].values())
+
+def pool_coeff(event, key):
+    return pool_coefficient(pool_total(event), event["pools"].get(key, (0, 0, 0))[0], PARI_MUTUEL_RAKE)
+
+def option_coeff(event, key):
+    if event.get("type") == "parimutuel":
+        return pool_coeff(event, key)
+    return event["options"][key]["coeff"]
 
 class Events(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.active_events = active_events
-
-    async def cog_load(self):
-        global active_events
-        active_events = await load_events_from_db()
-        self.active_events = active_events
+        # guild_id -> {event_id: событие}; сервер читается из БД при первом
+        # обращении, давно не используемые вытесняются (БД — источник истины)
+        self.active_events = LRUCache(EVENT_GUILD_CACHE_SIZE)
+
+    async def guild_events(self, guild_id):
+        events = self.active_events.get(guild_id)
+        if events is None:
+            loaded = await load_guild_events(guild_id)
+            # Пока шло чтение, сервер мог загрузить параллельный вызов
+            events = self.active_events.put_if_absent(guild_id, loaded)
+        return events
 
     @app_commands.command(name="events", description="Список событий")
     async def events(self, interaction: discord.Interaction, id_события: int = None):
         logger.info(f"📅 /events | Вызвал: {interaction.user} ({interaction.user.id}) | ID события: {id_события if id_события else 'Все'}")
         
         try:
-            evs = self.active_events.get(interaction.guild.id, {})
-            
             if id_события is None:
-                if not evs: 
+                rows = await get_event_list(interaction.guild.id)
+                if not rows: 
                     return await interaction.response.send_message("Нет активных событий.", ephemeral=True)
                 
                 embed = discord.Embed(title="📅 Активные события", color=discord.Color.blue())
-                for eid, data in evs.items():
-                    status = "🔒 (Закрыто)" if data["locked"] else "✅ (Открыто)"
+                for eid, title, locked in rows:
+                    status = "🔒 (Закрыто)" if locked else "✅ (Открыто)"
                     embed.add_field(
-                        name=f"ID: {eid} | {data['title']}", 
+                        name=f"ID: {eid} | {title}", 
                         value=f"Статус: {status}", 
                         inline=False
                     )
@@ -46,7 +68,7 @@ class Events(commands.Cog):
                 await interaction.response.send_message(embed=embed)
                 return
 
-            event = evs.get(id_события)
+            event = (await self.guild_events(interaction.guild.id)).get(id_события)
             if not event:
                 return await interaction.response.send_message(f"❌ Событие с ID **{id_события}** не найдено.", ephemeral=True)
 
@@ -64,10 +86,19 @@ class Events(commands.Cog):
             options_list = []
             for key, val in event['options'].items():
                 name = val['name']
-                coeff = val['coeff']
-                options_list.append(f"🔹 **{name}** — x`{coeff}`")
+                coeff = option_coeff(event, key)
+                stake, bets, bettors = event["pools"].get(key, (0, 0, 0))
+                coeff_text = f"x`{coeff}`" if coeff is not None else "x`—`"
+                options_list.append(f"🔹 **{name}** — {coeff_text} | 💰 {stake} ({bets} ставок, {bettors} игроков)")
             
-            embed.add_field(name="📊 Коэффициенты", value="\n".join(options_list), inline=False)
+            embed.add_field(name="📊 Коэффициенты и банк", value="\n".join(options_list), inline=False)
+
+            if event.get("type") == "parimutuel":
+                embed.add_field(
+                    name="⚖️ Тотализатор",
+                    value=f"Банк: **{pool_total(event)}** | Комиссия: {PARI_MUTUEL_RAKE:.0%}\nКэф меняется с каждой ставкой и фиксируется при завершении",
+                    inline=False
+                )
 
             if event.get("type") == "match" and "rosters" in event:
                 for team_name, roster_text in event["rosters"].items():
@@ -86,11 +117,12 @@ class Events(commands.Cog):
             )
 
     @app_commands.command(name="bet", description="Сделать ставку")
+    @rate_limit()
     async def bet(self, interaction: discord.Interaction, id_события: int, выбор: str, сумма: int):
         logger.info(f"🎲 /bet | Вызвал: {interaction.user} ({interaction.user.id}) | EventID: {id_события}")
         
         try:
-            ev = self.active_events.get(interaction.guild.id, {}).get(id_события)
+            ev = (await self.guild_events(interaction.guild.id)).get(id_события)
             if not ev: 
                 return await interaction.response.send_message("❌ Матч не найден.", ephemeral=True)
             if ev["locked"]: 
@@ -100,12 +132,22 @@ class Events(commands.Cog):
             if choice_key not in ev["options"]:
                 return await interaction.response.send_message(f"❌ Варианты: {', '.join(ev['options'].keys())}", ephemeral=True)
 
-            bal = await get_balance(interaction.user.id, interaction.guild.id)
-            if сумма < 10 or сумма > bal: 
+            async with lock_account(interaction.user.id, interaction.guild.id):
+                bal = await get_balance(interaction.user.id, interaction.guild.id)
+                accepted = 10 <= сумма <= bal
+                if accepted:
+                    ev["pools"][choice_key] = await place_bet(
+                        interaction.user.id, interaction.guild.id, id_события, choice_key, сумма, option_coeff(ev, choice_key)
+                    )
+                    await update_balance(interaction.user.id, interaction.guild.id, -сумма)
+
+            if not accepted:
                 return await interaction.response.send_message("❌ Ошибка суммы.", ephemeral=True)
 
-            await place_bet(interaction.user.id, interaction.guild.id, id_события, choice_key, сумма, ev["options"][choice_key]["coeff"])
-            await update_balance(interaction.user.id, interaction.guild.id, -сумма)
+            if ev.get("type") == "parimutuel":
+                return await interaction.response.send_message(
+                    f"✅ Ставка `{сумма}` на **{выбор}** принята! Текущий кэф: x`{option_coeff(ev, choice_key)}`"
+                )
             await interaction.response.send_message(f"✅ Ставка `{сумма}` на **{выбор}** принята!")
         
         except Exception as e:
@@ -121,7 +163,7 @@ class Events(commands.Cog):
         logger.info(f"⚔️ /create_match | Админ: {interaction.user} ({interaction.user.id})")
         
         try:
-            eid = (max(self.active_events.get(interaction.guild.id, {}).keys()) if self.active_events.get(interaction.guild.id, {}) else 0) + 1
+            eid = await allocate_event_id(interaction.guild.id)
             
             event_data = {
                 "type": "match",
@@ -131,10 +173,11 @@ class Events(commands.Cog):
                     команда1.lower(): {"name": команда1, "coeff": кэф1},
                     команда2.lower(): {"name": команда2, "coeff": кэф2}
                 },
+                "pools": {},
                 "locked": False
             }
             
-            self.active_events.setdefault(interaction.guild.id, {})[eid] = event_data
+            (await self.guild_events(interaction.guild.id))[eid] = event_data
             await save_event(interaction.guild.id, eid, event_data)
 
             embed = discord.Embed(title="🔔 НОВОЕ СОБЫТИЕ ОПУБЛИКОВАНО", color=discord.Color.gold())
@@ -161,8 +204,6 @@ class Events(commands.Cog):
         try:
             guild_id = interaction.guild.id
             
-            eid = (max(self.active_events.get(guild_id, {}).keys()) if self.active_events.get(guild_id, {}) else 0) + 1
-            
             options = {}
             player_list_display = []
 
@@ -185,14 +226,17 @@ class Events(commands.Cog):
             if len(options) < 2:
                 return await interaction.response.send_message("❌ Нужно минимум 2 игрока.", ephemeral=True)
 
+            eid = await allocate_event_id(guild_id)
+
             event_data = {
                 "type": "mvp",
                 "title": f"⭐ {название}",
                 "options": options,
+                "pools": {},
                 "locked": False
             }
 
-            self.active_events.setdefault(guild_id, {})[eid] = event_data
+            (await self.guild_events(guild_id))[eid] = event_data
             await save_event(guild_id, eid, event_data)
 
             embed = discord.Embed(
@@ -218,7 +262,7 @@ class Events(commands.Cog):
         logger.info(f"📊 /create_total | Админ: {interaction.user} ({interaction.user.id})")
         
         try:
-            eid = (max(self.active_events.get(interaction.guild.id, {}).keys()) if self.active_events.get(interaction.guild.id, {}) else 0) + 1
+            eid = await allocate_event_id(interaction.guild.id)
             
             event_data = {
                 "type": "total", 
@@ -227,9 +271,10 @@ class Events(commands.Cog):
                     "больше": {"name": "Больше", "coeff": кэф_бол}, 
                     "меньше": {"name": "Меньше", "coeff": кэф_мен}
                 },
+                "pools": {},
                 "locked": False
             }
-            self.active_events.setdefault(interaction.guild.id, {})[eid] = event_data
+            (await self.guild_events(interaction.guild.id))[eid] = event_data
             await save_event(interaction.guild.id, eid, event_data)
 
             embed = discord.Embed(title="📊 СТАВКА НА СТАТИСТИКУ", color=discord.Color.blue())
@@ -247,15 +292,71 @@ class Events(commands.Cog):
                 ephemeral=True
             )
 
+    @app_commands.command(name="create_pool", description="Админ: Создать тотализатор")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def create_pool(self, interaction: discord.Interaction, название: str, варианты: str):
+        logger.info(f"⚖️ /create_pool | Админ: {interaction.user} ({interaction.user.id})")
+        
+        try:
+            guild_id = interaction.guild.id
+
+            options = {}
+            for part in варианты.split(","):
+                name = part.strip()
+                if name:
+                    options[name.lower()] = {"name": name, "coeff": None}
+
+            if len(options) < 2:
+                return await interaction.response.send_message(
+                    "❌ Нужно минимум 2 варианта через запятую.\nПример: `NAVI, Vitality, FaZe`",
+                    ephemeral=True
+                )
+
+            eid = await allocate_event_id(guild_id)
+
+            event_data = {
+                "type": "parimutuel",
+                "title": f"⚖️ {название}",
+                "options": options,
+                "pools": {},
+                "locked": False
+            }
+
+            (await self.guild_events(guild_id))[eid] = event_data
+            await save_event(guild_id, eid, event_data)
+
+            embed = discord.Embed(
+                title="⚖️ ТОТАЛИЗАТОР ОТКРЫТ",
+                description=f"Событие: **{название}** (ID: `{eid}`)",
+                color=discord.Color.gold()
+            )
+            embed.add_field(name="Варианты:", value="\n".join(f"**{o['name']}**" for o in options.values()), inline=False)
+            embed.add_field(
+                name="📈 Коэффициенты",
+                value=f"Считаются из банка ставок (комиссия {PARI_MUTUEL_RAKE:.0%}): /events {eid}",
+                inline=False
+            )
+            embed.set_footer(text="Ставка: /bet")
+            
+            await interaction.response.send_message(embed=embed)
+        
+        except Exception as e:
+            logger.error(f"❌ Ошибка в /create_pool: {e}")
+            await interaction.response.send_message(
+                f"❌ Произошла ошибка: {str(e)[:100]}",
+                ephemeral=True
+            )
+
     @app_commands.command(name="lock", description="Админ: Закрыть ставки")
     @app_commands.checks.has_permissions(administrator=True)
     async def lock(self, interaction: discord.Interaction, id_события: int):
         logger.info(f"🔒 /lock | Админ: {interaction.user} ({interaction.user.id})")
         
         try:
-            if id_события in self.active_events.get(interaction.guild.id, {}):
-                self.active_events[interaction.guild.id][id_события]["locked"] = True
-                await save_event(interaction.guild.id, id_события, self.active_events[interaction.guild.id][id_события])
+            events = await self.guild_events(interaction.guild.id)
+            if id_события in events:
+                events[id_события]["locked"] = True
+                await set_event_locked(interaction.guild.id, id_события, True)
                 await interaction.response.send_message(f"🔒 Ставки на #{id_события} закрыты.")
             else:
                 await interaction.response.send_message("❌ Событие не найдено.", ephemeral=True)
@@ -273,9 +374,10 @@ class Events(commands.Cog):
         logger.info(f"🔓 /unlock | Админ: {interaction.user} ({interaction.user.id})")
         
         try:
-            if id_события in self.active_events.get(interaction.guild.id, {}):
-                self.active_events[interaction.guild.id][id_события]["locked"] = False
-                await save_event(interaction.guild.id, id_события, self.active_events[interaction.guild.id][id_события])
+            events = await self.guild_events(interaction.guild.id)
+            if id_события in events:
+                events[id_события]["locked"] = False
+                await set_event_locked(interaction.guild.id, id_события, False)
                 await interaction.response.send_message(f"🔓 Ставки на #{id_события} открыты.")
             else:
                 await interaction.response.send_message("❌ Событие не найдено.", ephemeral=True)
@@ -295,12 +397,13 @@ class Events(commands.Cog):
         try:
             guild_id = interaction.guild.id
             
-            if guild_id not in self.active_events or id_события not in self.active_events[guild_id]:
+            events = await self.guild_events(guild_id)
+            if id_события not in events:
                 return await interaction.response.send_message("❌ Событие не найдено.", ephemeral=True)
 
             await interaction.response.defer()
 
-            event = self.active_events[guild_id][id_события]
+            event = events[id_события]
             winner_key = победитель.lower().strip()
 
             if winner_key not in event['options']:
@@ -310,26 +413,21 @@ class Events(commands.Cog):
                     ephemeral=True
                 )
 
-            total_payouts = 0
             winner_display_name = event['options'][winner_key]['name']
-            payout_coeff = event['options'][winner_key]['coeff']
-
-            bets = await get_event_bets(guild_id, id_события)
-
-            for b_user_id, b_amount, b_choice in bets:
-                if b_choice.lower() == winner_key:
-                    payout = int(b_amount * payout_coeff)
-                    await update_balance(b_user_id, guild_id, payout)
-                    total_payouts += 1
-                    
-                    try:
-                        user = await self.bot.fetch_user(b_user_id)
-                        await user.send(f"🏆 Ваша ставка на **{event['title']}** сыграла! Выигрыш: **{payout}**")
-                    except:
-                        pass
+            # В тотализаторе всем победителям платится итоговый кэф банка,
+            # посчитанный в транзакции расчёта
+            if event.get("type") == "parimutuel":
+                winners, payout_coeff = await settle_event(guild_id, id_события, winner_key, event['title'], PARI_MUTUEL_RAKE)
+            else:
+                winners, _ = await settle_event(guild_id, id_события, winner_key, event['title'])
+                payout_coeff = event['options'][winner_key]['coeff']
+            events.pop(id_события, None)
+            total_payouts = len(winners)
 
-            await delete_event(guild_id, id_события)
-            del self.active_events[guild_id][id_события]
+            # Личные сообщения победителям рассылает cog Notifications
+            notifications = self.bot.get_cog("Notifications")
+            if notifications:
+                notifications.wake()
 
             logger.info(f"✅ /settle завершен | Событие {id_события} | Выплачено: {total_payouts}")
 
@@ -339,8 +437,10 @@ class Events(commands.Cog):
                 color=discord.Color.green()
             )
             embed.add_field(name="🏆 Победитель", value=f"**{winner_display_name}**", inline=True)
-            embed.add_field(name="📈 Коэффициент", value=f"x{payout_coeff}", inline=True)
+            embed.add_field(name="📈 Коэффициент", value=f"x{payout_coeff}" if payout_coeff is not None else "—", inline=True)
             embed.add_field(name="💰 Победителей", value=str(total_payouts), inline=True)
+            if total_payouts:
+                embed.set_footer(text="Победители получат уведомления в личные сообщения")
             
             await interaction.followup.send(embed=embed)
         
@@ -355,6 +455,4 @@ class Events(commands.Cog):
                 pass
 
 async def setup(bot):
-    cog = Events(bot)
-    await cog.cog_load()
-    await bot.add_cog(cog)
\ No newline at end of file
+    await bot.add_cog(Events(bot))
\ No newline at end of file
@@ -1,183 +1,161 @@
 import discord
-import random
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands, ui
 from logger_config import setup_logger
-from utils.db import get_balance, update_balance
+from utils.db import (
+    get_balance, adjust_balance, start_bomb_game, get_bomb_game,
+    update_bomb_game, delete_bomb_game, finish_bomb_game, expire_bomb_games
+)
+from utils.ratelimit import rate_limit
+from utils.locks import lock_account
+from utils.cache import LRUCache
+from utils import slots as slot_engine
+from utils import bombs as bomb_engine
+from utils import render
+from utils.streaks import streak_store
+from utils.rng import rng_service
+from config import (
+    STREAK_FLUSH_SECONDS, SLOTS_MAX_SPINS, BOMB_GAME_TTL_SECONDS, BOMB_SWEEP_SECONDS,
+    BOMB_GAMES_CACHE_SIZE
+)
 
 logger = setup_logger()
 
-user_retention_data = {}
-
-SYM_WILD = "👑"
-SYM_SCATTER = "⭐"
-SYM_HIGH = ["💎", "7️⃣"]
-SYM_MID = ["🔔", "🍉", "🍇"]
-SYM_LOW = ["🍋", "🍒", "🍎"]
-SYM_EMPTY = "⬛"
-
-PAYTABLE = {
-    "👑": [0, 0, 5, 20, 100],
-    "⭐": [0, 0, 10, 50, 200],
-    "💎": [0, 0, 4, 15, 50],
-    "7️⃣": [0, 0, 3, 10, 40],
-    "🔔": [0, 0, 3, 8, 30],
-    "🍉": [0, 0, 2, 5, 20],
-    "🍇": [0, 0, 1, 4, 15],
-    "🍋": [0, 0, 1, 2.5, 10],
-    "🍒": [0, 0, 1, 2, 8],
-    "🍎": [0, 0, 1, 1.5, 5],
-}
-
-PAYLINES = [
-    [1, 1, 1, 1, 1], [0, 0, 0, 0, 0], [2, 2, 2, 2, 2], 
-    [0, 1, 2, 1, 0], [2, 1, 0, 1, 2], 
-    [0, 0, 1, 2, 2], [2, 2, 1, 0, 0], 
-]
-
-ROULETTE_COLORS = {
-    0: "🟢",
-    **{n: "🔴" for n in [1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36]},
-    **{n: "⚫" for n in [2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35]}
-}
-
-CLOSED_CELL = "🔲"
-REVEALED_BOMB = "☠️"
-REVEALED_CRYSTAL = "✨"
-
-BOMB_COEFFICIENT_STEPS = {
-    1: 0.05,
-    2: 0.10,
-    3: 0.15,
-    4: 0.30,
-    5: 0.45,
-    6: 0.60,
-    7: 1.00,
-    8: 2.50,
-}
-
-def get_bomb_coefficient(bombs_count, crystals_found):
-    if bombs_count not in BOMB_COEFFICIENT_STEPS:
-        bombs_count = 8
-    
-    step = BOMB_COEFFICIENT_STEPS[bombs_count]
-    coeff = 1.0 + (step * crystals_found)
-    return coeff
-
-def get_reels():
-    reels = []
-    for _ in range(5):
-        strip = [SYM_WILD]*2 + [SYM_SCATTER]*1 + SYM_HIGH*3 + SYM_MID*6 + SYM_LOW*10
-        random.shuffle(strip)
-        reels.append(strip)
-    return reels
-
-REEL_STRIPS = get_reels()
-
-def force_win_grid():
-    grid = [[random.choice(SYM_LOW + SYM_MID) for _ in range(5)] for _ in range(3)]
-    line = random.choice(PAYLINES)
-    win_sym = random.choice(SYM_LOW + SYM_MID)
-    for i in range(random.randint(3, 4)):
-        grid[line[i]][i] = win_sym
-    return grid
-
-class BombButton(ui.Button):
-    def __init__(self, row: int, col: int, game_view: 'BombGameView', position: int):
-        labels = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣']
-        super().__init__(style=discord.ButtonStyle.secondary, label=labels[position], row=row)
-        self.row_idx = row
-        self.col_idx = col
-        self.game_view = game_view
+BOMB_LABELS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣']
+
+# Открытые игры game_id -> game_data. После рестарта кэш пуст: игра
+# поднимается из БД при первом нажатии на её кнопку.
+active_bomb_games = LRUCache(BOMB_GAMES_CACHE_SIZE)
+
+async def load_bomb_game(game_id):
+    game_data = active_bomb_games.get(game_id)
+    if game_data is not None:
+        return game_data
+
+    row = await get_bomb_game(game_id)
+    if not row:
+        return None
+
+    game_id, user_id, guild_id, bet, bombs_count, bombs_mask, revealed_mask = row
+    game_data = {
+        'game_id': game_id,
+        'bombs': bombs_mask,
+        'revealed': revealed_mask,
+        'bet': bet,
+        'bombs_count': bombs_count,
+        'crystals_total': 9 - bombs_count,
+        'user_id': user_id,
+        'guild_id': guild_id,
+    }
+    return active_bomb_games.put_if_absent(game_id, game_data)
+
+class BombButton(ui.DynamicItem[ui.Button], template=r"bombs:(?P<game_id>[0-9]+):(?P<position>[0-8])"):
+    def __init__(self, game_id: int, position: int):
+        super().__init__(ui.Button(
+            style=discord.ButtonStyle.secondary,
+            label=BOMB_LABELS[position],
+            row=position // 3,
+            custom_id=f"bombs:{game_id}:{position}"
+        ))
+        self.game_id = game_id
+        self.position = position
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(int(match["game_id"]), int(match["position"]))
 
     async def callback(self, interaction: discord.Interaction):
-        game_data = self.game_view.game_data
+        game_data = await load_bomb_game(self.game_id)
+        if game_data is None:
+            await interaction.response.send_message("❌ Эта игра уже завершена.", ephemeral=True)
+            return
+
+        game_view = BombGameView(game_data)
         
         if interaction.user.id != game_data['user_id']:
             await interaction.response.defer()
             return
 
-        if game_data['revealed'][self.row_idx][self.col_idx]:
+        if bomb_engine.is_revealed(game_data['revealed'], self.position):
             await interaction.response.defer()
             return
 
-        game_data['revealed'][self.row_idx][self.col_idx] = True
-        is_bomb = game_data['grid'][self.row_idx][self.col_idx]
+        game_data['revealed'] |= bomb_engine.cell(self.position)
 
         await interaction.response.defer()
 
-        if is_bomb:
-            await self.game_view.end_game_lose(interaction)
+        if bomb_engine.is_bomb(game_data['bombs'], self.position):
+            await game_view.end_game_lose(interaction)
         else:
-            win_streak = user_retention_data.get(interaction.user.id, 0)
+            win_streak = await streak_store.get(game_data['user_id'], game_data['guild_id'])
             loss_chance = min(0.50, (win_streak - 2) * 0.10) if win_streak > 2 else 0
             
-            if random.random() < loss_chance:
-                bomb_cells = [(y, x) for y in range(3) for x in range(3) 
-                             if not game_data['revealed'][y][x] and game_data['grid'][y][x]]
+            # RNG-сервис, переданный в cog (seeded/тестовый), а не глобальный
+            games_rng = interaction.client.get_cog("Games").rng
+            rng = games_rng.stream("bombs")
+            if rng.random() < loss_chance:
+                bomb_cells = bomb_engine.closed_bombs(game_data['bombs'], game_data['revealed'])
                 if bomb_cells:
-                    y, x = random.choice(bomb_cells)
-                    game_data['revealed'][y][x] = True
-                    await self.game_view.end_game_lose(interaction, forced_loss=True)
+                    forced_cell = rng.choice(bomb_cells)
+                    game_data['revealed'] |= bomb_engine.cell(forced_cell)
+                    logger.info(f"💣 /bombs | Игра #{self.game_id}: принудительная бомба в клетке {forced_cell} | {games_rng.draw_id('bombs')}")
+                    await game_view.end_game_lose(interaction, forced_loss=True)
                     return
             
-            crystals_found = sum(1 for y in range(3) for x in range(3) 
-                               if game_data['revealed'][y][x] and not game_data['grid'][y][x])
+            crystals_found = bomb_engine.crystals_found(game_data['bombs'], game_data['revealed'])
             
             if crystals_found == game_data['crystals_total']:
-                await self.game_view.finish_game(interaction, auto_win=True)
+                await game_view.finish_game(interaction, auto_win=True)
             else:
-                await self.game_view.update_game_board(interaction)
-
-class FinishButton(ui.Button):
-    def __init__(self, game_view: 'BombGameView'):
-        super().__init__(style=discord.ButtonStyle.success, label="✅ Закончить", row=2)
-        self.game_view = game_view
+                await update_bomb_game(self.game_id, game_data['revealed'])
+                await game_view.update_game_board(interaction)
+
+class FinishButton(ui.DynamicItem[ui.Button], template=r"bombs:(?P<game_id>[0-9]+):finish"):
+    def __init__(self, game_id: int):
+        super().__init__(ui.Button(
+            style=discord.ButtonStyle.success,
+            label="✅ Закончить",
+            row=2,
+            custom_id=f"bombs:{game_id}:finish"
+        ))
+        self.game_id = game_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(int(match["game_id"]))
 
     async def callback(self, interaction: discord.Interaction):
-        game_data = self.game_view.game_data
+        game_data = await load_bomb_game(self.game_id)
+        if game_data is None:
+            await interaction.response.send_message("❌ Эта игра уже завершена.", ephemeral=True)
+            return
         
         if interaction.user.id != game_data['user_id']:
             await interaction.response.defer()
             return
 
         await interaction.response.defer()
-        await self.game_view.finish_game(interaction, auto_win=False)
+        await BombGameView(game_data).finish_game(interaction, auto_win=False)
 
 class BombGameView(ui.View):
     def __init__(self, game_data):
-        super().__init__(timeout=600)
+        super().__init__(timeout=None)
         self.game_data = game_data
 
+        for position in range(9):
+            self.add_item(BombButton(game_data['game_id'], position))
+        self.add_item(FinishButton(game_data['game_id']))
+
     def _render_bomb_board(self):
-        revealed = self.game_data['revealed']
-        grid = self.game_data['grid']
-        
-        board = ""
-        for row_idx in range(3):
-            row = ""
-            for col_idx in range(3):
-                if revealed[row_idx][col_idx]:
-                    if grid[row_idx][col_idx]:
-                        row += REVEALED_BOMB + " "
-                    else:
-                        row += REVEALED_CRYSTAL + " "
-                else:
-                    row += CLOSED_CELL + " "
-            board += row + "\n"
-        return board
+        return render.bomb_board(self.game_data['bombs'], self.game_data['revealed'])
 
     async def update_game_board(self, interaction: discord.Interaction):
         board = self._render_bomb_board()
-        crystals_found = sum(1 for y in range(3) for x in range(3) 
-                           if self.game_data['revealed'][y][x] and not self.game_data['grid'][y][x])
-        coeff = get_bomb_coefficient(self.game_data['bombs_count'], crystals_found)
-
-        embed = discord.Embed(
-            title="💣 БОМБЫ 💣",
-            description=f"Ищи кристаллы и избегай бомб!\n\n**Ставка:** `{self.game_data['bet']}` Лоресиков",
-            color=discord.Color.purple()
-        )
+        crystals_found = bomb_engine.crystals_found(self.game_data['bombs'], self.game_data['revealed'])
+        coeff = bomb_engine.coefficient(self.game_data['bombs_count'], crystals_found)
+
+        embed = render.embed("bombs")
+        embed.description = f"Ищи кристаллы и избегай бомб!\n\n**Ставка:** `{self.game_data['bet']}` Лоресиков"
         embed.add_field(name="Поле:", value=board, inline=False)
         embed.add_field(name="Бомб на поле", value=f"`{self.game_data['bombs_count']}`", inline=True)
         embed.add_field(name="Текущий коэффициент", value=f"x`{coeff:.2f}`", inline=True)
@@ -186,19 +164,18 @@ class BombGameView(ui.View):
         await interaction.message.edit(embed=embed, view=self)
 
     async def end_game_lose(self, interaction: discord.Interaction, forced_loss: bool = False):
-        for y in range(3):
-            for x in range(3):
-                self.game_data['revealed'][y][x] = True
+        active_bomb_games.pop(self.game_data['game_id'])
+        if not await delete_bomb_game(self.game_data['game_id']):
+            return
+
+        self.game_data['revealed'] = bomb_engine.FULL_MASK
 
         board = self._render_bomb_board()
-        user_retention_data[self.game_data['user_id']] = user_retention_data.get(self.game_data['user_id'], 0) + 1
+        await streak_store.incr(self.game_data['user_id'], self.game_data['guild_id'])
 
         loss_message = "💔 Ставка потеряна"
 
-        embed = discord.Embed(
-            title="☠️ ИГРА ОКОНЧЕНА - БОМБА!",
-            color=discord.Color.red()
-        )
+        embed = render.embed("bombs_lose")
         embed.add_field(name="Поле:", value=board, inline=False)
         embed.add_field(name="Результат:", value=loss_message, inline=False)
         new_bal = await get_balance(interaction.user.id, self.game_data['guild_id'])
@@ -212,33 +189,28 @@ class BombGameView(ui.View):
             logger.info(f"💣 /bombs | {interaction.user} попал на бомбу и проиграл {self.game_data['bet']}")
 
     async def finish_game(self, interaction: discord.Interaction, auto_win: bool = False):
-        crystals_found = sum(1 for y in range(3) for x in range(3) 
-                           if self.game_data['revealed'][y][x] and not self.game_data['grid'][y][x])
-        
-        coeff = get_bomb_coefficient(self.game_data['bombs_count'], crystals_found)
+        crystals_found = bomb_engine.crystals_found(self.game_data['bombs'], self.game_data['revealed'])
+        coeff = bomb_engine.coefficient(self.game_data['bombs_count'], crystals_found)
         payout = int(self.game_data['bet'] * coeff)
 
-        await update_balance(interaction.user.id, self.game_data['guild_id'], payout)
-        user_retention_data[interaction.user.id] = 0
+        active_bomb_games.pop(self.game_data['game_id'])
+        new_bal = await finish_bomb_game(self.game_data['game_id'], payout)
+        if new_bal is None:
+            return
+        streak_store.reset(self.game_data['user_id'], self.game_data['guild_id'])
 
-        for y in range(3):
-            for x in range(3):
-                self.game_data['revealed'][y][x] = True
+        self.game_data['revealed'] = bomb_engine.FULL_MASK
 
         board = self._render_bomb_board()
 
         finish_type = "Все кристаллы найдены!" if auto_win else "Финиш выигрыш!"
 
-        embed = discord.Embed(
-            title="🎉 ИГРА ЗАВЕРШЕНА - ПОБЕДА!",
-            color=discord.Color.green()
-        )
+        embed = render.embed("bombs_win")
         embed.add_field(name="Поле:", value=board, inline=False)
         embed.add_field(name="Открыто кристаллов", value=f"`{crystals_found}/{self.game_data['crystals_total']}`", inline=True)
         embed.add_field(name="Бомб на поле", value=f"`{self.game_data['bombs_count']}`", inline=True)
         embed.add_field(name="Коэффициент", value=f"x`{coeff:.2f}`", inline=True)
         embed.add_field(name="Результат:", value=f"💰 **+{payout}** Лоресиков\n_{finish_type}_", inline=False)
-        new_bal = await get_balance(interaction.user.id, self.game_data['guild_id'])
         embed.set_footer(text=f"Ваш баланс: {new_bal} Лоресиков")
 
         await interaction.message.edit(embed=embed, view=None)
@@ -246,116 +218,159 @@ class BombGameView(ui.View):
         logger.info(f"💣 /bombs | {interaction.user} выиграл {payout} (кристаллов: {crystals_found}, коэф: {coeff:.2f}, авто: {auto_win})")
 
 class Games(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, rng=None):
         self.bot = bot
+        self.rng = rng or rng_service
+        self.reel_windows = slot_engine.build_reels(self.rng.stream("reels"))
+
+    async def cog_load(self):
+        # Кнопки «Бомб» переживают рестарт: обработчик находит игру по custom_id
+        self.bot.add_dynamic_items(BombButton, FinishButton)
+        render.warm()
+        self.flush_streaks.start()
+        self.sweep_bomb_games.start()
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(BombButton, FinishButton)
+        self.flush_streaks.cancel()
+        self.sweep_bomb_games.cancel()
+        await streak_store.flush()
+
+    @tasks.loop(seconds=STREAK_FLUSH_SECONDS)
+    async def flush_streaks(self):
+        await streak_store.flush()
+
+    # Первый проход — сразу при загрузке cog: подчищает игры, брошенные до рестарта
+    @tasks.loop(seconds=BOMB_SWEEP_SECONDS)
+    async def sweep_bomb_games(self):
+        try:
+            expired = await expire_bomb_games(BOMB_GAME_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"❌ [BOMBS] Ошибка очистки брошенных игр: {e}")
+            return
+        for game_id, *_ in expired:
+            active_bomb_games.pop(game_id)
 
     @app_commands.command(name="slots", description="Слот-машина 3x5")
-    async def slots(self, interaction: discord.Interaction, ставка: int):
-        logger.info(f"🎰 /slots | Вызвал: {interaction.user} | Ставка: {ставка}")
+    @rate_limit()
+    @app_commands.describe(
+        ставка="Сумма Лоресиков за один спин",
+        спины=f"Сколько спинов подряд (1-{SLOTS_MAX_SPINS})"
+    )
+    async def slots(self, interaction: discord.Interaction, ставка: int, спины: int = 1):
+        logger.info(f"🎰 /slots | Вызвал: {interaction.user} | Ставка: {ставка} | Спинов: {спины}")
         user_id = interaction.user.id
         guild_id = interaction.guild.id
         
         if ставка < 10:
             return await interaction.response.send_message("❌ Минимальная ставка — 10.", ephemeral=True)
         
-        bal = await get_balance(user_id, guild_id)
-        if ставка > bal:
-            return await interaction.response.send_message(f"❌ Недостаточно средств ({bal})", ephemeral=True)
-
+        if спины < 1 or спины > SLOTS_MAX_SPINS:
+            return await interaction.response.send_message(f"❌ Количество спинов должно быть от 1 до {SLOTS_MAX_SPINS}.", ephemeral=True)
+        
+        if спины > 1:
+            return await self._slots_session(interaction, ставка, спины)
+        
         await interaction.response.defer()
 
-        await update_balance(user_id, guild_id, -ставка)
-        
-        if user_id not in user_retention_data:
-            user_retention_data[user_id] = 0
+        async with lock_account(user_id, guild_id):
+            bal = await get_balance(user_id, guild_id)
+            if ставка <= bal:
+                new_bal = await adjust_balance(user_id, guild_id, -ставка)
+
+        if ставка > bal:
+            return await interaction.followup.send(f"❌ Недостаточно средств ({bal})", ephemeral=True)
         
-        loss_streak = user_retention_data[user_id]
-        pity_chance = min(0.70, loss_streak * 0.07)
+        loss_streak = await streak_store.get(user_id, guild_id)
+        rng = self.rng.stream("slots")
+        draw_id = self.rng.draw_id("slots")
         
-        if loss_streak >= 2 and random.random() < pity_chance:
-            grid = force_win_grid()
+        if loss_streak >= 2 and rng.random() < slot_engine.pity_chance(loss_streak):
+            grid = slot_engine.force_win_grid(rng)
         else:
-            grid = [[None for _ in range(5)] for _ in range(3)]
-            for c in range(5):
-                stop = random.randint(0, len(REEL_STRIPS[c])-1)
-                for r in range(3):
-                    grid[r][c] = REEL_STRIPS[c][(stop + r) % len(REEL_STRIPS[c])]
-
-        total_win = 0
-        win_coords = set()
-        details = []
-
-        for idx, line in enumerate(PAYLINES):
-            match_sym = grid[line[0]][0]
-            count = 1
-            temp_coords = [(line[0], 0)]
-            
-            for c in range(1, 5):
-                char = grid[line[c]][c]
-                if char == match_sym or char == SYM_WILD or match_sym == SYM_WILD:
-                    count += 1
-                    temp_coords.append((line[c], c))
-                    if match_sym == SYM_WILD and char != SYM_WILD:
-                        match_sym = char
-                else:
-                    break
-            
-            if count >= 3:
-                pay_sym = SYM_WILD if match_sym == SYM_WILD else match_sym
-                mult = PAYTABLE[pay_sym][count-1]
-                if mult > 0:
-                    win_amount = int(ставка * mult)
-                    total_win += win_amount
-                    details.append(f"Линия {idx+1}: {pay_sym} x{count}")
-                    for coord in temp_coords: win_coords.add(coord)
+            grid = slot_engine.spin_grid(self.reel_windows, rng)
+
+        result = slot_engine.evaluate(grid, ставка)
+        total_win = result.total_win
 
         if total_win > 0:
-            await update_balance(user_id, guild_id, total_win)
-            user_retention_data[user_id] = 0 
-            color = discord.Color.green()
-            title = "🎰 ВЫИГРЫШ!"
+            new_bal = await adjust_balance(user_id, guild_id, total_win)
+            streak_store.reset(user_id, guild_id)
+            embed = render.embed("slots_win")
             result_text = f"💰 **+{total_win}** Лоресиков"
-            logger.info(f"🎰 /slots | Результат: WIN | {interaction.user} выиграл {total_win}")
+            logger.info(f"🎰 /slots | Результат: WIN | {interaction.user} выиграл {total_win} | {draw_id} | поле {slot_engine.grid_codes(grid)}")
         else:
-            user_retention_data[user_id] += 1 
-            color = discord.Color.red()
-            title = "🎰 КАЗИНО"
+            await streak_store.incr(user_id, guild_id)
+            embed = render.embed("slots_lose")
             result_text = "Ничего не выпало. Попробуй еще раз!"
-            logger.info(f"🎰 /slots | Результат: LOSE | {interaction.user} проиграл {ставка}")
+            logger.info(f"🎰 /slots | Результат: LOSE | {interaction.user} проиграл {ставка} | {draw_id} | поле {slot_engine.grid_codes(grid)}")
 
-        board = ""
-        for r in range(3):
-            row_icons = []
-            for c in range(5):
-                row_icons.append(grid[r][c])
-            board += " | ".join(row_icons) + "\n"
+        board = slot_engine.render_board(grid)
 
-        embed = discord.Embed(title=title, color=color)
         embed.add_field(name="Спины", value=f"```\n{board}\n```", inline=False)
 
         if total_win > 0:
-            line_map = ""
-            for r in range(3):
-                row_map = []
-                for c in range(5):
-                    if (r, c) in win_coords:
-                        row_map.append(grid[r][c]) 
-                    else:
-                        row_map.append(SYM_EMPTY)
-                line_map += " ".join(row_map) + "\n"
-            
+            line_map = slot_engine.render_win_map(grid, result.win_mask)
             embed.add_field(name="🏆 Выигрышная схема", value=f"```\n{line_map}\n```", inline=False)
             
-            if details:
-                embed.add_field(name="Инфо", value="\n".join(details[:3]), inline=True)
+            if result.lines:
+                embed.add_field(name="Инфо", value="\n".join(slot_engine.describe_line(line) for line in result.lines[:3]), inline=True)
 
         embed.add_field(name="Результат:", value=result_text, inline=False)
-        new_bal = await get_balance(user_id, guild_id)
-        embed.set_footer(text=f"Ваш баланс: {new_bal} Лоресиков")
+        embed.set_footer(text=f"Ваш баланс: {new_bal} Лоресиков • {draw_id}")
+
+        await interaction.followup.send(embed=embed)
+
+    async def _slots_session(self, interaction: discord.Interaction, ставка: int, спины: int):
+        user_id = interaction.user.id
+        guild_id = interaction.guild.id
+        total_bet = ставка * спины
+
+        await interaction.response.defer()
+
+        # Ставка и выигрыш всех спинов — одно изменение баланса
+        async with lock_account(user_id, guild_id):
+            bal = await get_balance(user_id, guild_id)
+            if total_bet <= bal:
+                loss_streak = await streak_store.get(user_id, guild_id)
+                draw_id = self.rng.draw_id("slots")
+                results, loss_streak = slot_engine.spin_session(спины, ставка, self.reel_windows, loss_streak, self.rng.stream("slots"))
+                total_win = sum(result.total_win for result in results)
+                new_bal = await adjust_balance(user_id, guild_id, total_win - total_bet)
+                streak_store.set(user_id, guild_id, loss_streak)
+
+        if total_bet > bal:
+            return await interaction.followup.send(f"❌ Недостаточно средств: нужно {total_bet}, у вас {bal}", ephemeral=True)
+
+        net = total_win - total_bet
+        logger.info(f"🎰 /slots | Серия из {спины} | {interaction.user} поставил {total_bet}, выиграл {total_win} (итог {net:+}) | {draw_id} | поля {' '.join(slot_engine.grid_codes(result.grid) for result in results)}")
+
+        embed = render.embed("slots_win" if net > 0 else "slots_lose")
+
+        strip = "\n".join(
+            f"{i:>2}. {slot_engine.render_strip(result.grid)}  {f'+{result.total_win}' if result.total_win else '—'}"
+            for i, result in enumerate(results, 1)
+        )
+        embed.add_field(name="Спины", value=f"```\n{strip}\n```", inline=False)
+
+        best = max(
+            ((line, i) for i, result in enumerate(results, 1) for line in result.lines),
+            key=lambda item: item[0][3],
+            default=None
+        )
+        if best:
+            line, i = best
+            embed.add_field(name="🏆 Лучшая линия", value=f"{slot_engine.describe_line(line)} (спин {i}) — **+{line[3]}**", inline=False)
+
+        embed.add_field(name="Поставлено", value=f"`{total_bet}` Лоресиков", inline=True)
+        embed.add_field(name="Выиграно", value=f"`{total_win}` Лоресиков", inline=True)
+        embed.add_field(name="Итог", value=f"**{net:+}** Лоресиков", inline=True)
+        embed.set_footer(text=f"Ваш баланс: {new_bal} Лоресиков • {draw_id}")
 
         await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="roulette", description="Европейская рулетка")
+    @rate_limit()
     @app_commands.describe(
         ставка="Сумма Лоресиков",
         тип_ставки="red, black, zero, even, odd, или (0-36)"
@@ -369,10 +384,6 @@ class Games(commands.Cog):
         if ставка < 10:
             return await interaction.response.send_message("❌ Минимальная ставка — 10.", ephemeral=True)
         
-        bal = await get_balance(user_id, guild_id)
-        if ставка > bal:
-            return await interaction.response.send_message(f"❌ Недостаточно средств ({bal})", ephemeral=True)
-
         is_numeric = choice.isdigit() and 0 <= int(choice) <= 36
         if choice in ["zero", "0"]: 
             is_numeric = True
@@ -384,15 +395,19 @@ class Games(commands.Cog):
 
         await interaction.response.send_message("⚪ Шарик запущен... Колесо вращается...")
 
-        await update_balance(user_id, guild_id, -ставка)
+        async with lock_account(user_id, guild_id):
+            bal = await get_balance(user_id, guild_id)
+            if ставка <= bal:
+                new_bal = await adjust_balance(user_id, guild_id, -ставка)
 
-        if user_id not in user_retention_data: 
-            user_retention_data[user_id] = 0
-        
-        result = random.randint(0, 36)
+        if ставка > bal:
+            return await interaction.edit_original_response(content=f"❌ Недостаточно средств ({bal})")
+
+        result = self.rng.stream("roulette").randint(0, 36)
+        draw_id = self.rng.draw_id("roulette")
 
         win_multiplier = 0
-        res_color = ROULETTE_COLORS[result]
+        res_color = render.ROULETTE_COLORS[result]
         
         if is_numeric and int(choice) == result:
             win_multiplier = 36 
@@ -407,42 +422,30 @@ class Games(commands.Cog):
 
         if win_multiplier > 0:
             total_payout = ставка * win_multiplier
-            await update_balance(user_id, guild_id, total_payout)
-            user_retention_data[user_id] = 0
-            color = discord.Color.green()
-            title = "🎉 ПОБЕДА В РУЛЕТКЕ!"
+            new_bal = await adjust_balance(user_id, guild_id, total_payout)
+            streak_store.reset(user_id, guild_id)
+            embed = render.embed("roulette_win")
             summary = f"💰 **+{total_payout}** Лоресиков"
-            logger.info(f"🎰 /roulette | Результат: WIN | {interaction.user} выиграл {total_payout}")
+            logger.info(f"🎰 /roulette | Результат: WIN | {interaction.user} выиграл {total_payout} | {draw_id} | выпало {result}")
         else:
-            user_retention_data[user_id] += 1
-            color = discord.Color.red() 
-            title = "💀 СТАВКА НЕ СЫГРАЛА"
+            await streak_store.incr(user_id, guild_id)
+            embed = render.embed("roulette_lose")
             summary = "Ничего не выпало. Попробуй еще раз!"
-            logger.info(f"🎰 /roulette | Результат: LOSE | {interaction.user} проиграл {ставка}")
-
-        def get_lane(res):
-            items = []
-            for i in range(res - 2, res + 3):
-                n = i % 37
-                c = ROULETTE_COLORS[n]
-                if n == res: items.append(f"**[{c}{n}]**")
-                else: items.append(f"{c}{n}")
-            return " — ".join(items)
-
-        embed = discord.Embed(title=title, color=color)
-        embed.add_field(name="Вращение", value=f"```\n{get_lane(result)}\n```", inline=False)
+            logger.info(f"🎰 /roulette | Результат: LOSE | {interaction.user} проиграл {ставка} | {draw_id} | выпало {result}")
+
+        embed.add_field(name="Вращение", value=render.roulette_lane(result), inline=False)
         
         bet_display = f"ЗЕРО" if choice == "0" else choice.upper()
         embed.add_field(name="Ваша ставка", value=f"`{bet_display}`", inline=True)
-        embed.add_field(name="Выпало", value=f"{res_color} **{result}**", inline=True)
+        embed.add_field(name="Выпало", value=render.roulette_result(result), inline=True)
         
         embed.add_field(name="Результат:", value=f"{summary}", inline=False)
-        new_bal = await get_balance(user_id, guild_id)
-        embed.set_footer(text=f"Ваш баланс: {new_bal} Лоресиков")
+        embed.set_footer(text=f"Ваш баланс: {new_bal} Лоресиков • {draw_id}")
 
         await interaction.edit_original_response(content=None, embed=embed)
 
     @app_commands.command(name="bombs", description="Игра 'Бомбы' - ищи кристаллы, избегай бомб")
+    @rate_limit()
     @app_commands.describe(
         ставка="Сумма Лоресиков",
         бомб="Количество бомб на поле (1-8)"
@@ -458,69 +461,45 @@ class Games(commands.Cog):
         if бомб < 1 or бомб > 8:
             return await interaction.response.send_message("❌ Количество бомб должно быть от 1 до 8.", ephemeral=True)
         
-        bal = await get_balance(user_id, guild_id)
-        if ставка > bal:
-            return await interaction.response.send_message(f"❌ Недостаточно средств ({bal})", ephemeral=True)
-
         await interaction.response.defer()
 
-        if user_id not in user_retention_data:
-            user_retention_data[user_id] = 0
-        
-        loss_streak = user_retention_data[user_id]
-        win_chance = min(0.70, 0.5 + (loss_streak * 0.05))
+        async with lock_account(user_id, guild_id):
+            bal = await get_balance(user_id, guild_id)
+            if ставка <= bal:
+                bombs_mask = bomb_engine.place_bombs(бомб, self.rng.stream("bombs"))
+                draw_id = self.rng.draw_id("bombs")
 
-        await update_balance(user_id, guild_id, -ставка)
+                game_id, new_bal = await start_bomb_game(user_id, guild_id, ставка, бомб, bombs_mask)
 
-        grid = [[False for _ in range(3)] for _ in range(3)]
-        
-        bomb_positions = set()
-        while len(bomb_positions) < бомб:
-            x = random.randint(0, 2)
-            y = random.randint(0, 2)
-            bomb_positions.add((x, y))
-        
-        for x, y in bomb_positions:
-            grid[y][x] = True
+        if ставка > bal:
+            return await interaction.followup.send(f"❌ Недостаточно средств ({bal})", ephemeral=True)
 
         game_data = {
-            'grid': grid,
-            'bomb_positions': bomb_positions,
-            'revealed': [[False for _ in range(3)] for _ in range(3)],
+            'game_id': game_id,
+            'bombs': bombs_mask,
+            'revealed': 0,
             'bet': ставка,
             'bombs_count': бомб,
             'crystals_total': 9 - бомб,
-            'will_win': random.random() < win_chance,
             'user_id': user_id,
             'guild_id': guild_id,
         }
+        active_bomb_games.put(game_id, game_data)
+        logger.info(f"💣 /bombs | Игра #{game_id} создана | {draw_id} | бомбы {bombs_mask:09b}")
 
         view = BombGameView(game_data)
-        
-        position = 0
-        for row in range(3):
-            for col in range(3):
-                button = BombButton(row, col, view, position)
-                view.add_item(button)
-                position += 1
-        
-        view.add_item(FinishButton(view))
 
         board = view._render_bomb_board()
-        current_coeff = get_bomb_coefficient(бомб, 0)
-        embed = discord.Embed(
-            title="💣 БОМБЫ 💣",
-            description=f"Ищи кристаллы и избегай бомб!\n\n**Ставка:** `{ставка}` Лоресиков",
-            color=discord.Color.purple()
-        )
+        current_coeff = bomb_engine.coefficient(бомб, 0)
+        embed = render.embed("bombs")
+        embed.description = f"Ищи кристаллы и избегай бомб!\n\n**Ставка:** `{ставка}` Лоресиков"
         embed.add_field(name="Поле:", value=board, inline=False)
         embed.add_field(name="Бомб на поле", value=f"`{бомб}`", inline=True)
         embed.add_field(name="Текущий коэффициент", value=f"x`{current_coeff:.2f}`", inline=True)
         embed.add_field(name="Кристаллов доступно", value=f"`{9 - бомб}`", inline=True)
-        new_bal = await get_balance(user_id, guild_id)
         embed.set_footer(text=f"Ваш баланс: {new_bal} Лоресиков")
 
-        msg = await interaction.followup.send(embed=embed, view=view)
+        await interaction.followup.send(embed=embed, view=view)
 
 async def setup(bot):
     await bot.add_cog(Games(bot))
\ No newline at end of file
@@ -17,7 +17,7 @@ class Help(commands.Cog):
         embed.add_field(name="💰 Экономика и Игры", value=(
             "`/balance` — Проверить счет\n"
             "`/top` — Топ богачей сервера\n"
-            "`/slots [сумма]` — Играть в казино\n"
+            "`/slots [сумма] [спины (опц)]` — Играть в казино\n"
             "`/roulette [сумма] [тип_ставки]` — Европейская рулетка\n"
             "`/events` — Список активных матчей\n"
             "`/bet [id_события] [выбор] [сумма]` — Сделать ставку\n"
@@ -37,6 +37,7 @@ class Help(commands.Cog):
                 "`/create_match` — Создать матч 1vs1\n"
                 "`/create_mvp` — Ставка на лучшего игрока\n"
                 "`/create_total` — Ставка на счет (Больше/Меньше)\n"
+                "`/create_pool` — Тотализатор: кэф считается из банка ставок\n"
                 "`/lock [id_события]` — Закрыть прием ставок\n"
                 "`/unlock [id_события]` — Открыть прием ставок\n"
                 "`/settle [id_события] [победитель]` — Выплатить выигрыши\n"
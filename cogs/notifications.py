@@ -0,0 +1,106 @@
+import discord
+import asyncio
+import contextlib
+import time
+from discord.ext import commands
+from logger_config import setup_logger
+from utils.db import get_due_notifications, delete_notification, reschedule_notification
+from config import (
+    NOTIFY_CONCURRENCY, NOTIFY_BATCH_SIZE, NOTIFY_POLL_SECONDS,
+    NOTIFY_MAX_ATTEMPTS, NOTIFY_RETRY_SECONDS
+)
+
+logger = setup_logger()
+
+# --- ДОСТАВКА УВЕДОМЛЕНИЙ ---
+# /settle только кладёт выигрыши в таблицу notifications (в транзакции
+# расчёта), а этот cog в фоне рассылает личные сообщения: не больше
+# NOTIFY_CONCURRENCY одновременно, с паузой всей рассылки после 429 и
+# повторами с экспоненциальной задержкой. Недоставленное переживает рестарт.
+
+class Notifications(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._wake = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+        self._resume_at = 0.0
+        self._task = None
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+    async def cog_load(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def cog_unload(self):
+        if self._task:
+            self._task.cancel()
+            # Дождаться отмены текущей рассылки до close_db() в MyBot.close()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        logger.info(f"📨 [NOTIFY] Отправлено: {self.sent}, отброшено: {self.failed}, 429: {self.rate_limited}")
+
+    def wake(self):
+        self._wake.set()
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                batch = await get_due_notifications(time.time(), NOTIFY_BATCH_SIZE)
+            except Exception as e:
+                logger.error(f"❌ [NOTIFY] Ошибка чтения очереди: {e}")
+                batch = []
+
+            if not batch:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), NOTIFY_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await asyncio.gather(*(self._deliver(*row) for row in batch), return_exceptions=True)
+
+    async def _deliver(self, notification_id, user_id, guild_id, event_id, title, amount, attempts):
+        async with self._semaphore:
+            pause = self._resume_at - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            try:
+                user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+                await user.send(f"🏆 Ваша ставка на **{title}** сыграла! Выигрыш: **{amount}**")
+            except (discord.Forbidden, discord.NotFound) as e:
+                # Личка закрыта или пользователя нет — повтор не поможет
+                self.failed += 1
+                await delete_notification(notification_id)
+                logger.warning(f"⚠️ [NOTIFY] Не доставлено {user_id} (событие {event_id}): {e}")
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    self.rate_limited += 1
+                    retry_after = getattr(e, "retry_after", None) or NOTIFY_RETRY_SECONDS
+                    self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+                    await reschedule_notification(notification_id, time.time() + retry_after, count_attempt=False)
+                    logger.warning(f"⏳ [NOTIFY] 429 от Discord, пауза {retry_after:.1f} с")
+                else:
+                    await self._retry(notification_id, user_id, event_id, attempts, e)
+            except Exception as e:
+                await self._retry(notification_id, user_id, event_id, attempts, e)
+            else:
+                self.sent += 1
+                await delete_notification(notification_id)
+
+    async def _retry(self, notification_id, user_id, event_id, attempts, error):
+        if attempts + 1 >= NOTIFY_MAX_ATTEMPTS:
+            self.failed += 1
+            await delete_notification(notification_id)
+            logger.error(f"❌ [NOTIFY] Отброшено после {attempts + 1} попыток: {user_id} (событие {event_id}): {error}")
+            return
+
+        delay = NOTIFY_RETRY_SECONDS * 2 ** attempts
+        await reschedule_notification(notification_id, time.time() + delay)
+        logger.warning(f"⚠️ [NOTIFY] Ошибка отправки {user_id}, повтор через {delay:.0f} с: {error}")
+
+async def setup(bot):
+    await bot.add_cog(Notifications(bot))
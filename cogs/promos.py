@@ -5,11 +5,13 @@ from datetime import datetime, timezone
 from typing import Optional
 from logger_config import setup_logger
 from utils.db import (
-    get_balance, update_balance, get_promo,
+    adjust_balance, get_promo,
     create_promo, delete_promo, get_all_promos,
     check_promo_redemption, add_promo_redemption,
     get_promo_use_count
 )
+from utils.ratelimit import rate_limit
+from utils.locks import lock_account
 
 logger = setup_logger()
 
@@ -18,6 +20,7 @@ class Promos(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="promo", description="Активировать промокод")
+    @rate_limit()
     async def promo(self, interaction: discord.Interaction, код: str):
         logger.info(f"🎫 /promo | Вызвал: {interaction.user} ({interaction.user.id}) | Код: {код}")
         user_id = interaction.user.id
@@ -51,30 +54,26 @@ class Promos(commands.Cog):
                         ephemeral=True
                     )
             
-            already = await check_promo_redemption(код, user_id, guild_id)
-            
-            if already:
-                return await interaction.response.send_message(
-                    "❌ Вы уже активировали этот промокод!",
-                    ephemeral=True
-                )
-            
-            success = await add_promo_redemption(код, user_id, guild_id)
-            
+            success = False
+            async with lock_account(user_id, guild_id):
+                already = await check_promo_redemption(код, user_id, guild_id)
+                if not already:
+                    success = await add_promo_redemption(код, user_id, guild_id)
+                if success:
+                    new_bal = await adjust_balance(user_id, guild_id, reward)
+
             if not success:
                 return await interaction.response.send_message(
                     "❌ Вы уже активировали этот промокод!",
                     ephemeral=True
                 )
             
-            await update_balance(user_id, guild_id, reward)
-            
             embed = discord.Embed(
                 title="🎉 Промокод активирован!",
                 color=discord.Color.green()
             )
             embed.add_field(name="Вам начислено", value=f"`{reward}` Лоресиков", inline=True)
-            embed.add_field(name="Новый баланс", value=f"`{await get_balance(user_id, guild_id)}` Лоресиков", inline=True)
+            embed.add_field(name="Новый баланс", value=f"`{new_bal}` Лоресиков", inline=True)
             
             await interaction.response.send_message(embed=embed)
         
@@ -3,10 +3,12 @@ from discord.ext import commands
 from discord import app_commands
 from logger_config import setup_logger
 from utils.db import (
-    get_balance, update_balance, get_shop_items, get_shop_item,
+    get_balance, adjust_balance, get_shop_items, get_shop_item,
     get_user_inventory, add_item_to_inventory, remove_item_from_inventory,
     is_one_time_purchased, mark_one_time_purchased
 )
+from utils.ratelimit import rate_limit
+from utils.locks import lock_account
 
 logger = setup_logger()
 
@@ -77,6 +79,7 @@ class Shop(commands.Cog):
             )
 
     @app_commands.command(name="buy", description="Купить товар")
+    @rate_limit()
     async def buy(self, interaction: discord.Interaction, id_товара: int, кол_во: int = 1):
         logger.info(f"🛒 /buy | Вызвал: {interaction.user} ({interaction.user.id}) | ID товара: {id_товара} | Кол-во: {кол_во}")
         
@@ -99,25 +102,24 @@ class Shop(commands.Cog):
                     ephemeral=True
                 )
             
-            if is_one_time:
-                already_bought = await is_one_time_purchased(user_id, guild_id, item_id)
-                if already_bought:
-                    return await interaction.response.send_message(
-                        f"❌ Вы уже купили этот товар! Он одноразовый.",
-                        ephemeral=True
-                    )
-            
-            balance = await get_balance(user_id, guild_id)
+            # Проверка покупки и списание под одной блокировкой счёта
             total_price = price * кол_во
-            
-            if balance < total_price:
-                return await interaction.response.send_message(
-                    f"❌ Недостаточно средств! Нужно {total_price}, у вас {balance}.",
-                    ephemeral=True
-                )
-            
-            await update_balance(user_id, guild_id, -total_price)
-            await add_item_to_inventory(user_id, guild_id, item_id, кол_во)
+            error = None
+            async with lock_account(user_id, guild_id):
+                balance = await get_balance(user_id, guild_id)
+                if is_one_time and await is_one_time_purchased(user_id, guild_id, item_id):
+                    error = "❌ Вы уже купили этот товар! Он одноразовый."
+                elif balance < total_price:
+                    error = f"❌ Недостаточно средств! Нужно {total_price}, у вас {balance}."
+                else:
+                    new_bal = await adjust_balance(user_id, guild_id, -total_price)
+                    await add_item_to_inventory(user_id, guild_id, item_id, кол_во)
+                
+                    if is_one_time:
+                        await mark_one_time_purchased(user_id, guild_id, item_id)
+
+            if error:
+                return await interaction.response.send_message(error, ephemeral=True)
             
             role_given = False
             if item_type == "role" and role_id:
@@ -129,9 +131,6 @@ class Shop(commands.Cog):
                 except Exception as e:
                     logger.error(f"Ошибка выдачи роли: {e}")
             
-            if is_one_time:
-                await mark_one_time_purchased(user_id, guild_id, item_id)
-            
             embed = discord.Embed(
                 title="✅ Покупка успешна!",
                 description=f"Вы купили **{name}**",
@@ -141,7 +140,7 @@ class Shop(commands.Cog):
             embed.add_field(name="Количество", value=f"`{кол_во}` шт.", inline=True)
             embed.add_field(name="Цена за единицу", value=f"`{price}` Лоресиков", inline=True)
             embed.add_field(name="Общая цена", value=f"`{total_price}` Лоресиков", inline=True)
-            embed.add_field(name="Новый баланс", value=f"`{balance - total_price}` Лоресиков", inline=True)
+            embed.add_field(name="Новый баланс", value=f"`{new_bal}` Лоресиков", inline=True)
             if role_given:
                 embed.add_field(name="👑 Роль выдана!", value=role.mention, inline=True)
             
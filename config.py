@@ -7,6 +7,70 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 COMMAND_PREFIX = "/"
 
 DB_NAME = "economy.db"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 4))
+
+# Применяются к каждому соединению пула
+DB_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,        # ~16 МБ кэша страниц
+    "mmap_size": 134217728,      # 128 МБ
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,        # мс
+}
+
+# Групповая фиксация записей балансов и ставок
+DB_BATCH_MAX_SIZE = int(os.getenv("DB_BATCH_MAX_SIZE", 64))
+DB_BATCH_MAX_DELAY_MS = float(os.getenv("DB_BATCH_MAX_DELAY_MS", 5))
+
+# Максимум балансов в LRU-кэше
+BALANCE_CACHE_SIZE = int(os.getenv("BALANCE_CACHE_SIZE", 10000))
+
+# Ограничение частоты: команда -> (вызовов, за секунд) на пользователя в сервере
+RATE_LIMITS = {
+    "slots": (5, 10),
+    "roulette": (5, 10),
+    "bombs": (3, 10),
+    "pay": (3, 10),
+    "buy": (3, 10),
+    "bet": (5, 10),
+    "promo": (3, 30),
+}
+RATE_LIMIT_DEFAULT = (5, 10)
+RATE_LIMIT_BUCKETS = int(os.getenv("RATE_LIMIT_BUCKETS", 100000))
+
+# Серии игроков: сколько держать в памяти и как часто сбрасывать в БД
+STREAK_CACHE_SIZE = int(os.getenv("STREAK_CACHE_SIZE", 10000))
+STREAK_TTL_SECONDS = int(os.getenv("STREAK_TTL_SECONDS", 3600))
+STREAK_FLUSH_SECONDS = int(os.getenv("STREAK_FLUSH_SECONDS", 30))
+
+# Брошенные игры «Бомбы»: через сколько секунд после создания ставка сгорает
+# и как часто проверять
+BOMB_GAME_TTL_SECONDS = int(os.getenv("BOMB_GAME_TTL_SECONDS", 3600))
+BOMB_SWEEP_SECONDS = int(os.getenv("BOMB_SWEEP_SECONDS", 300))
+# Сколько открытых игр «Бомбы» держать в памяти (остальные читаются из БД)
+BOMB_GAMES_CACHE_SIZE = int(os.getenv("BOMB_GAMES_CACHE_SIZE", 1000))
+
+# Максимум спинов за один вызов /slots
+SLOTS_MAX_SPINS = int(os.getenv("SLOTS_MAX_SPINS", 10))
+
+# Случайность в играх: "secure" (os.urandom) или "seeded" (воспроизводимо по RNG_SEED)
+RNG_MODE = os.getenv("RNG_MODE", "secure")
+RNG_SEED = int(os.getenv("RNG_SEED")) if os.getenv("RNG_SEED") else None
+RNG_BUFFER_SIZE = int(os.getenv("RNG_BUFFER_SIZE", 4096))
+
+# Доставка личных сообщений из очереди notifications
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", 5))
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", 50))
+NOTIFY_POLL_SECONDS = float(os.getenv("NOTIFY_POLL_SECONDS", 10))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", 5))
+NOTIFY_RETRY_SECONDS = float(os.getenv("NOTIFY_RETRY_SECONDS", 30))
+
+# Сколько серверов держат события в памяти (остальные читаются из БД при обращении)
+EVENT_GUILD_CACHE_SIZE = int(os.getenv("EVENT_GUILD_CACHE_SIZE", 1000))
+
+# Доля банка тотализатора, которая не возвращается победителям
+PARI_MUTUEL_RAKE = float(os.getenv("PARI_MUTUEL_RAKE", 0.05))
 
 DEFAULT_BALANCE = 100
 MIN_BET = 10
@@ -29,6 +29,15 @@ class MyBot(commands.Bot):
         await self.tree.sync()
         logger.info("✅ Команды синхронизированы с Discord")
 
+    async def close(self):
+        await super().close()
+        from utils import close_db
+        from utils.ratelimit import get_rate_limit_stats
+        from utils.locks import get_lock_stats
+        logger.info(f"⏳ Ограничение частоты: {get_rate_limit_stats()['rejected']}")
+        logger.info(f"🔒 Блокировки счетов: {get_lock_stats()}")
+        await close_db()
+
 async def load_cogs(bot):
     cogs_dir = "cogs"
     
@@ -55,8 +64,6 @@ bot = MyBot()
 
 @bot.event
 async def on_ready():
-    from utils import init_db
-    await init_db()
     logger.info(f"✅ БОТ ЗАПУЩЕН | Учётная запись: {bot.user} (ID: {bot.user.id})")
     logger.info(f"🌐 Бот подключён к {len(bot.guilds)} серверам")
 
@@ -65,6 +72,16 @@ async def on_ready():
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: Exception):
     from discord.app_commands import CheckFailure
+    from utils.ratelimit import RateLimited
+
+    # Троттлинг — не ошибка: короткий ответ без embed и без ERROR в логе
+    if isinstance(error, RateLimited):
+        logger.info(f"⏳ RATE LIMIT | /{error.command} | Юзер: {interaction.user} ({interaction.user.id}) | Повтор через {error.retry_after:.1f} с")
+        try:
+            await interaction.response.send_message(f"⏳ Не так быстро! Попробуй снова через {error.retry_after:.1f} с.", ephemeral=True)
+        except Exception as handler_error:
+            logger.error(f"❌ Ошибка в обработчике ошибок: {handler_error}")
+        return
     
     logger.error(f"❌ ERROR | Команда: {interaction.command.name if interaction.command else 'Unknown'} | Юзер: {interaction.user} ({interaction.user.id}) | Ошибка: {error}")
     
@@ -98,6 +115,8 @@ async def on_app_command_error(interaction: discord.Interaction, error: Exceptio
 # --- ЗАПУСК ---
 
 async def main():
+    from utils import init_db
+    await init_db()
     async with bot:
         await load_cogs(bot)
         await bot.start(SECRET_KEY)
@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db
+from config import DB_POOL_SIZE, DB_BATCH_MAX_SIZE, DB_BATCH_MAX_DELAY_MS, BALANCE_CACHE_SIZE
+
+# --- НАГРУЗОЧНЫЙ ТЕСТ СЛОЯ БД ---
+# Гоняет функции utils/db.py из N параллельных asyncio-задач на временной
+# базе и печатает JSON с пропускной способностью, p50/p95/p99 задержек
+# и числом ошибок блокировки по каждому сценарию.
+#
+#   python tools/bench_db.py --tasks 200 --ops 50 --mix all --output bench.json
+
+GUILD_ID = 1
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = Counter()
+        self.lock_errors = 0
+
+    async def call(self, name, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        except sqlite3.OperationalError as e:
+            message = str(e).lower()
+            if "locked" in message or "busy" in message:
+                self.lock_errors += 1
+            self.errors[name] += 1
+        except Exception:
+            self.errors[name] += 1
+        finally:
+            self.samples[name].append(time.perf_counter() - start)
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(recorder, elapsed):
+    operations = {}
+    total = 0
+    for name, values in sorted(recorder.samples.items()):
+        values.sort()
+        total += len(values)
+        operations[name] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3),
+            "errors": recorder.errors.get(name, 0),
+        }
+    return {
+        "elapsed_s": round(elapsed, 4),
+        "operations_total": total,
+        "throughput_ops_s": round(total / elapsed, 1) if elapsed else 0,
+        "lock_errors": recorder.lock_errors,
+        "errors_total": sum(recorder.errors.values()),
+        "operations": operations,
+    }
+
+# --- СЦЕНАРИИ ---
+
+async def slots_task(rec, rng, users, ops):
+    # Как /slots: проверка баланса, списание ставки, иногда выигрыш, иногда /top
+    for _ in range(ops):
+        user_id = rng.randrange(users)
+        bet = rng.choice([10, 20, 50])
+        await rec.call("get_balance", db.get_balance(user_id, GUILD_ID))
+        await rec.call("adjust_balance", db.adjust_balance(user_id, GUILD_ID, -bet))
+        if rng.random() < 0.3:
+            await rec.call("adjust_balance", db.adjust_balance(user_id, GUILD_ID, bet * rng.choice([1, 2, 5])))
+        if rng.random() < 0.05:
+            await rec.call("get_user_top", db.get_user_top(GUILD_ID))
+
+async def settle_task(rec, rng, users, ops, events):
+    # Как /bet перед расчётом: проверка баланса, ставка, списание
+    for _ in range(ops):
+        user_id = rng.randrange(users)
+        event_id = rng.randrange(events) + 1
+        amount = rng.choice([10, 25, 100])
+        await rec.call("get_balance", db.get_balance(user_id, GUILD_ID))
+        await rec.call("place_bet", db.place_bet(user_id, GUILD_ID, event_id, rng.choice(["a", "b"]), amount, 1.9))
+        await rec.call("adjust_balance", db.adjust_balance(user_id, GUILD_ID, -amount))
+
+async def shop_task(rec, rng, users, ops, item_ids, promo_codes):
+    # Как /shop + /buy + /promo во время распродажи
+    for _ in range(ops):
+        user_id = rng.randrange(users)
+        roll = rng.random()
+        if roll < 0.6:
+            await rec.call("get_shop_items", db.get_shop_items(GUILD_ID))
+            await rec.call("get_balance", db.get_balance(user_id, GUILD_ID))
+            await rec.call("adjust_balance", db.adjust_balance(user_id, GUILD_ID, -10))
+            await rec.call("add_item_to_inventory", db.add_item_to_inventory(user_id, GUILD_ID, rng.choice(item_ids)))
+        elif roll < 0.9:
+            code = rng.choice(promo_codes)
+            await rec.call("get_promo", db.get_promo(code))
+            await rec.call("get_promo_use_count", db.get_promo_use_count(code))
+            await rec.call("check_promo_redemption", db.check_promo_redemption(code, user_id, GUILD_ID))
+            redeemed = await rec.call("add_promo_redemption", db.add_promo_redemption(code, user_id, GUILD_ID))
+            if redeemed:
+                await rec.call("adjust_balance", db.adjust_balance(user_id, GUILD_ID, 50))
+        else:
+            await rec.call("get_user_top", db.get_user_top(GUILD_ID))
+
+async def run_mix(name, args, rng):
+    rec = Recorder()
+    start = time.perf_counter()
+
+    if name == "slots":
+        await asyncio.gather(*[
+            slots_task(rec, random.Random(rng.random()), args.users, args.ops) for _ in range(args.tasks)
+        ])
+    elif name == "settle":
+        await asyncio.gather(*[
+            settle_task(rec, random.Random(rng.random()), args.users, args.ops, args.events) for _ in range(args.tasks)
+        ])
+        for event_id in range(1, args.events + 1):
+            await rec.call("settle_event", db.settle_event(GUILD_ID, event_id, "a"))
+    elif name == "shop":
+        item_ids = []
+        for i in range(5):
+            item_id = await db.create_shop_item(GUILD_ID, f"bench-{rng.random()}-{i}", "bench", 10, "item")
+            item_ids.append(item_id)
+        promo_codes = []
+        for i in range(3):
+            code = f"BENCH{rng.randrange(10**9)}{i}"
+            await db.create_promo(code, 50, None, 0, args.users)
+            promo_codes.append(code)
+        await asyncio.gather(*[
+            shop_task(rec, random.Random(rng.random()), args.users, args.ops, item_ids, promo_codes) for _ in range(args.tasks)
+        ])
+
+    return summarize(rec, time.perf_counter() - start)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест utils/db.py")
+    parser.add_argument("--tasks", type=int, default=100, help="параллельных задач")
+    parser.add_argument("--ops", type=int, default=50, help="итераций сценария на задачу")
+    parser.add_argument("--users", type=int, default=500, help="число разных пользователей")
+    parser.add_argument("--events", type=int, default=5, help="событий в сценарии settle")
+    parser.add_argument("--mix", choices=["slots", "settle", "shop", "all"], default="all")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="путь к файлу базы (по умолчанию временный)")
+    parser.add_argument("--output", help="куда записать JSON (по умолчанию stdout)")
+    parser.add_argument("--verbose", action="store_true", help="не глушить логи бота")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("bot").setLevel(logging.WARNING)
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+    await db.init_db(path)
+
+    rng = random.Random(args.seed)
+    mixes = ["slots", "settle", "shop"] if args.mix == "all" else [args.mix]
+    results = {}
+    for mix in mixes:
+        results[mix] = await run_mix(mix, args, rng)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "sqlite_version": sqlite3.sqlite_version,
+        "params": vars(args) | {"db": path},
+        "config": {
+            "DB_POOL_SIZE": DB_POOL_SIZE,
+            "DB_BATCH_MAX_SIZE": DB_BATCH_MAX_SIZE,
+            "DB_BATCH_MAX_DELAY_MS": DB_BATCH_MAX_DELAY_MS,
+            "BALANCE_CACHE_SIZE": BALANCE_CACHE_SIZE,
+        },
+        "mixes": results,
+        "batches": db.get_batch_stats(),
+        "balance_cache": db.get_cache_stats(),
+    }
+    await db.close_db()
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    asyncio.run(main())
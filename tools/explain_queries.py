@@ -0,0 +1,134 @@
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db
+
+# --- ПРОВЕРКА ПЛАНОВ ЗАПРОСОВ ---
+# Прогоняет все функции utils/db.py на временной базе, перехватывает
+# каждый выполненный SQL-запрос и печатает для него EXPLAIN QUERY PLAN.
+# Код выхода 1, если какой-то запрос делает полный SCAN таблицы — в том
+# числе по индексу (SCAN ... USING INDEX читает весь индекс). Допустим
+# только SEARCH.
+#
+#   python tools/explain_queries.py
+
+# Запросы, которые читают таблицу целиком намеренно
+EXPECTED_SCANS = {
+    "SELECT code, reward, expires_at, created_by, max_uses FROM promo_codes ORDER BY code",
+}
+
+SKIP_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "CREATE", "ALTER", "EXPLAIN")
+
+def normalize(sql):
+    sql = " ".join(sql.split())
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])", "?", sql)
+    return sql
+
+async def exercise():
+    await db.get_balance(1, 1)
+    await db.adjust_balance(1, 1, 50)
+    await db.adjust_balance(2, 1, -10)
+    await db.get_user_top(1)
+    await db.save_streaks([(1, 1, 3), (2, 1, 0)])
+    await db.get_streak(1, 1)
+
+    game_id, _ = await db.start_bomb_game(1, 1, 10, 3, 0b111)
+    await db.get_bomb_game(game_id)
+    await db.update_bomb_game(game_id, 0b1000)
+    await db.finish_bomb_game(game_id, 15)
+    game_id, _ = await db.start_bomb_game(1, 1, 10, 3, 0b111)
+    await db.delete_bomb_game(game_id)
+    await db.expire_bomb_games(3600)
+
+    item_id = await db.create_shop_item(1, "Предмет", "Описание", 10, "item")
+    await db.get_shop_items(1)
+    await db.get_shop_item(item_id, 1)
+    await db.add_item_to_inventory(1, 1, item_id, 2)
+    await db.get_user_inventory(1, 1)
+    await db.remove_item_from_inventory(1, 1, item_id, 1)
+    await db.is_one_time_purchased(1, 1, item_id)
+    await db.mark_one_time_purchased(1, 1, item_id)
+    await db.delete_shop_item(item_id, 1)
+
+    await db.allocate_event_id(1)
+    await db.allocate_event_id(1)
+    await db.save_event(1, 1, {
+        "type": "match", "title": "Матч", "locked": False,
+        "rosters": {"A": "a1, a2", "B": "b1, b2"},
+        "options": {"a": {"name": "A", "coeff": 2.0}, "b": {"name": "B", "coeff": 1.8}},
+    })
+    await db.load_guild_events(1)
+    await db.get_event_list(1)
+    await db.set_event_locked(1, 1, True)
+    await db.place_bet(1, 1, 1, "a", 10, 2.0)
+    await db.place_bet(2, 1, 1, "b", 10, 2.0)
+    await db.place_bet(2, 1, 1, "b", 5, 2.0)
+    await db.get_bet_pools(1, 1)
+    await db.get_event_bets(1, 1)
+    await db.settle_event(1, 1, "a", "Матч", 0.05)
+    rows = await db.get_due_notifications(0)
+    await db.get_due_notifications(10 ** 10)
+    for row in rows:
+        await db.reschedule_notification(row[0], 0)
+        await db.delete_notification(row[0])
+    await db.save_event(1, 2, {"type": "total", "title": "Тотал", "options": {}, "locked": False})
+    await db.delete_event(1, 2)
+
+    await db.create_promo("CODE", 10, None, 1, 5)
+    await db.get_promo("CODE")
+    await db.get_all_promos()
+    await db.check_promo_redemption("CODE", 1, 1)
+    await db.add_promo_redemption("CODE", 1, 1)
+    await db.get_promo_use_count("CODE")
+    await db.delete_promo("CODE")
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "explain.db")
+    await db.init_db(path)
+
+    statements = {}
+
+    def tracer(sql):
+        if sql.lstrip().upper().startswith(SKIP_PREFIXES):
+            return
+        statements.setdefault(normalize(sql), sql)
+
+    await db.trace_queries(tracer)
+    await exercise()
+    await db.trace_queries(None)
+    await db.close_db()
+
+    conn = sqlite3.connect(path)
+    bad = 0
+    for key, sql in statements.items():
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        # Сканирование материализованного подзапроса — не сканирование таблицы
+        subqueries = {step.split()[1] for step in plan if step.startswith("MATERIALIZE")}
+        scans = [
+            step for step in plan
+            if step.startswith("SCAN") and step.split()[1] not in subqueries and step != "SCAN CONSTANT ROW"
+        ]
+        flag = "OK  "
+        if scans:
+            if key in EXPECTED_SCANS:
+                flag = "FULL"
+            else:
+                flag = "SCAN"
+                bad += 1
+        print(f"[{flag}] {key}")
+        for step in plan:
+            print(f"         {step}")
+    conn.close()
+
+    print(f"\nЗапросов: {len(statements)}, с полным сканированием: {bad}")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
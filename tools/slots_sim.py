@@ -0,0 +1,154 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("❌ Для симулятора нужен numpy: pip install numpy")
+
+from utils import slots
+from utils.rng import RNGService
+from config import RNG_MODE, RNG_SEED
+
+# --- СИМУЛЯТОР RTP ДЛЯ /slots ---
+# Монте-Карло на массивах NumPy: много независимых игроков крутят слоты
+# параллельно, у каждого своя серия проигрышей, поэтому жалость
+# (force_win_grid) срабатывает так же, как в Games.slots. Линии
+# оцениваются по тем же таблицам utils/slots.py, что и в боте. Печатает
+# JSON с RTP, частотой выигрышей, дисперсией и распределением выплат.
+#
+#   python tools/slots_sim.py --players 100000 --spins 200 --bet 10
+
+PITY_SYMBOLS = np.array(slots.PITY_CODES, dtype=np.int8)
+LINES_ARR = np.array(slots.PAYLINES, dtype=np.int8)
+LINE_MULT = np.array(slots.LINE_MULT, dtype=np.float64)
+LINE_POSITIONS = np.array(slots.LINE_POSITIONS, dtype=np.intp)
+LINE_WEIGHTS = len(slots.SYMBOLS) ** np.arange(slots.COLS - 1, -1, -1)
+
+PAYOUT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+
+def build_strips(reels_seed):
+    if reels_seed is None:
+        # Как в боте: поток "reels" сервиса из config (в seeded — те же ленты)
+        strips = slots.get_reels(RNGService(RNG_MODE, RNG_SEED).stream("reels"))
+    else:
+        strips = slots.get_reels(random.Random(reels_seed))
+    return np.array([[slots.CODES[s] for s in strip] for strip in strips], dtype=np.int8)
+
+def spin_grids(rng, strips, n):
+    length = strips.shape[1]
+    stops = rng.integers(0, length, size=(n, 5))
+    rows = (stops[:, None, :] + np.arange(3)[None, :, None]) % length
+    return strips[np.arange(5)[None, None, :], rows]
+
+def pity_grids(rng, n):
+    grids = rng.choice(PITY_SYMBOLS, size=(n, 3, 5))
+    lines = LINES_ARR[rng.integers(0, len(LINES_ARR), size=n)]
+    win_sym = rng.choice(PITY_SYMBOLS, size=n)
+    length = rng.integers(3, 5, size=n)
+    idx = np.arange(n)
+    for col in range(4):
+        mask = col < length
+        grids[idx[mask], lines[mask, col], col] = win_sym[mask]
+    return grids
+
+def evaluate(grids, bet):
+    # Векторный аналог slots.evaluate: индекс линии -> множитель из таблицы
+    flat = grids.reshape(len(grids), -1).astype(np.int64)
+    keys = flat[:, LINE_POSITIONS] @ LINE_WEIGHTS
+    return np.floor(bet * LINE_MULT[keys]).astype(np.int64).sum(axis=1)
+
+def simulate(players, spins, bet, seed, reels_seed, pity):
+    rng = np.random.default_rng(seed)
+    strips = build_strips(reels_seed)
+
+    streak = np.zeros(players, dtype=np.int32)
+    total_won = 0
+    hits = 0
+    pity_spins = 0
+    pity_won = 0
+    sum_mult = 0.0
+    sum_mult_sq = 0.0
+    max_win = 0
+    histogram = np.zeros(len(PAYOUT_BUCKETS), dtype=np.int64)
+
+    for _ in range(spins):
+        grids = spin_grids(rng, strips, players)
+        forced = np.zeros(players, dtype=bool)
+        if pity:
+            chance = np.minimum(0.70, streak * 0.07)
+            forced = (streak >= 2) & (rng.random(players) < chance)
+            if forced.any():
+                grids[forced] = pity_grids(rng, int(forced.sum()))
+
+        wins = evaluate(grids, bet)
+        won = wins > 0
+        streak = np.where(won, 0, streak + 1)
+
+        mult = wins / bet
+        total_won += int(wins.sum())
+        hits += int(won.sum())
+        pity_spins += int(forced.sum())
+        pity_won += int(wins[forced].sum())
+        sum_mult += float(mult.sum())
+        sum_mult_sq += float((mult * mult).sum())
+        max_win = max(max_win, int(wins.max()))
+        histogram += np.bincount(np.searchsorted(PAYOUT_BUCKETS, mult[won], side="right") - 1, minlength=len(PAYOUT_BUCKETS))
+
+    total_spins = players * spins
+    total_staked = total_spins * bet
+    mean = sum_mult / total_spins
+    variance = sum_mult_sq / total_spins - mean * mean
+
+    distribution = {"x0": round(1 - hits / total_spins, 6)}
+    for i, low in enumerate(PAYOUT_BUCKETS):
+        label = f"x{low}+" if i == len(PAYOUT_BUCKETS) - 1 else f"x{low}-{PAYOUT_BUCKETS[i + 1]}"
+        distribution[label] = round(int(histogram[i]) / total_spins, 6)
+
+    return {
+        "spins": total_spins,
+        "bet": bet,
+        "rtp": round(total_won / total_staked, 6),
+        "rtp_from_pity": round(pity_won / total_staked, 6),
+        "hit_frequency": round(hits / total_spins, 6),
+        "pity_frequency": round(pity_spins / total_spins, 6),
+        "variance": round(variance, 4),
+        "std_dev": round(variance ** 0.5, 4),
+        "max_win_x": round(max_win / bet, 2),
+        "payout_distribution": distribution,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Монте-Карло RTP для /slots")
+    parser.add_argument("--players", type=int, default=100000, help="параллельных игроков")
+    parser.add_argument("--spins", type=int, default=100, help="спинов на игрока")
+    parser.add_argument("--bet", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reels-seed", type=int, help="перемешать ленты с этим seed (по умолчанию — как в боте по RNG_MODE/RNG_SEED)")
+    parser.add_argument("--no-pity", action="store_true", help="без принудительных выигрышей")
+    parser.add_argument("--output", help="куда записать JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    logging.getLogger("bot").setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    report = simulate(args.players, args.spins, args.bet, args.seed, args.reels_seed, not args.no_pity)
+    report["elapsed_s"] = round(time.perf_counter() - start, 2)
+    report["params"] = vars(args)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
 from utils.db import (
     get_balance,
+    adjust_balance,
     update_balance,
+    transfer,
+    start_bomb_game,
+    get_bomb_game,
+    update_bomb_game,
+    delete_bomb_game,
+    expire_bomb_games,
+    finish_bomb_game,
+    get_streak,
+    save_streaks,
     add_item_to_inventory,
     remove_item_from_inventory,
     get_user_inventory,
@@ -10,10 +20,19 @@ from utils.db import (
     delete_shop_item,
     is_one_time_purchased,
     mark_one_time_purchased,
-    load_events_from_db,
+    load_guild_events,
+    allocate_event_id,
+    get_event_list,
     save_event,
+    set_event_locked,
     delete_event,
+    settle_event,
+    pool_coefficient,
     get_event_bets,
+    get_bet_pools,
+    get_due_notifications,
+    delete_notification,
+    reschedule_notification,
     place_bet,
     get_promo,
     create_promo,
@@ -24,11 +43,24 @@ from utils.db import (
     get_promo_use_count,
     get_user_top,
     init_db,
+    close_db,
+    get_batch_stats,
+    get_cache_stats,
 )
 
 __all__ = [
     'get_balance',
+    'adjust_balance',
     'update_balance',
+    'transfer',
+    'start_bomb_game',
+    'get_bomb_game',
+    'update_bomb_game',
+    'delete_bomb_game',
+    'expire_bomb_games',
+    'finish_bomb_game',
+    'get_streak',
+    'save_streaks',
     'add_item_to_inventory',
     'remove_item_from_inventory',
     'get_user_inventory',
@@ -38,10 +70,19 @@ __all__ = [
     'delete_shop_item',
     'is_one_time_purchased',
     'mark_one_time_purchased',
-    'load_events_from_db',
+    'load_guild_events',
+    'allocate_event_id',
+    'get_event_list',
     'save_event',
+    'set_event_locked',
     'delete_event',
+    'settle_event',
+    'pool_coefficient',
     'get_event_bets',
+    'get_bet_pools',
+    'get_due_notifications',
+    'delete_notification',
+    'reschedule_notification',
     'place_bet',
     'get_promo',
     'create_promo',
@@ -52,4 +93,7 @@ __all__ = [
     'get_promo_use_count',
     'get_user_top',
     'init_db',
+    'close_db',
+    'get_batch_stats',
+    'get_cache_stats',
 ]
\ No newline at end of file
@@ -0,0 +1,133 @@
+import asyncio
+from collections import Counter
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# --- ГРУППОВАЯ ФИКСАЦИЯ ЗАПИСЕЙ ---
+# Записи от параллельных команд складываются в очередь и выполняются
+# одной транзакцией: каждые max_delay_ms миллисекунд или как только
+# набралось max_batch_size операций. Каждая операция идёт в своём
+# SAVEPOINT, поэтому ошибка одной не откатывает остальные. Вызывающий
+# получает результат только после COMMIT всей пачки.
+
+class WriteBatcher:
+    def __init__(self, pool, max_batch_size=64, max_delay_ms=5):
+        self.pool = pool
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_delay = max(0, max_delay_ms) / 1000
+        self._pending = []
+        self._has_work = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = None
+        self._flushing = False
+        self.batches = 0
+        self.operations = 0
+        self.failed = 0
+        self.max_batch = 0
+        self.batch_sizes = Counter()
+
+    def _ensure_worker(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker())
+
+    async def submit(self, op):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((op, future))
+        self._has_work.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        self._ensure_worker()
+        return await future
+
+    async def _worker(self):
+        while True:
+            await self._has_work.wait()
+            if len(self._pending) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if not self._pending:
+                self._has_work.clear()
+
+            if batch:
+                self._flushing = True
+                try:
+                    await self._flush(batch)
+                finally:
+                    self._flushing = False
+
+    async def _flush(self, batch):
+        outcomes = []
+        try:
+            async with self.pool.write() as db:
+                for op, future in batch:
+                    await db.execute("SAVEPOINT batch_op")
+                    try:
+                        result = await op(db)
+                    except Exception as e:
+                        await db.execute("ROLLBACK TO batch_op")
+                        await db.execute("RELEASE batch_op")
+                        outcomes.append((future, e, None))
+                    else:
+                        await db.execute("RELEASE batch_op")
+                        outcomes.append((future, None, result))
+        except Exception as e:
+            logger.error(f"❌ [DB] Ошибка фиксации пачки из {len(batch)} операций: {e}")
+            self.failed += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        size = len(batch)
+        self.batches += 1
+        self.operations += size
+        self.max_batch = max(self.max_batch, size)
+        self.batch_sizes[size] += 1
+
+        for future, error, result in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                self.failed += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def close(self):
+        # Дожидаемся, пока воркер допишет очередь, и только потом останавливаем
+        while self._task is not None and not self._task.done() and (self._pending or self._flushing):
+            self._full.set()
+            await asyncio.sleep(self.max_delay)
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            await self._flush(batch)
+        self._has_work.clear()
+        self._full.clear()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "operations": self.operations,
+            "failed": self.failed,
+            "max_batch": self.max_batch,
+            "avg_batch": round(self.operations / self.batches, 2) if self.batches else 0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
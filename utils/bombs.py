@@ -0,0 +1,76 @@
+import random
+
+# --- ДВИЖОК «БОМБ» 3x3 ---
+# Состояние игры — два 9-битных числа: bombs (где лежат бомбы) и
+# revealed (какие клетки открыты). Клетка (row, col) — бит row * 3 + col.
+# Подсчёт кристаллов, поиск закрытых бомб и отрисовка поля — выборки из
+# заранее посчитанных таблиц, без проходов по вложенным спискам.
+
+SIZE = 3
+CELLS = SIZE * SIZE
+FULL_MASK = (1 << CELLS) - 1
+
+CLOSED_CELL = "🔲"
+REVEALED_BOMB = "☠️"
+REVEALED_CRYSTAL = "✨"
+
+BOMB_COEFFICIENT_STEPS = {
+    1: 0.05,
+    2: 0.10,
+    3: 0.15,
+    4: 0.30,
+    5: 0.45,
+    6: 0.60,
+    7: 1.00,
+    8: 2.50,
+}
+
+# Маска -> число установленных битов / номера установленных битов
+POPCOUNT = [bin(mask).count("1") for mask in range(FULL_MASK + 1)]
+BITS = [tuple(p for p in range(CELLS) if mask >> p & 1) for mask in range(FULL_MASK + 1)]
+
+def _render_row(bombs_row, revealed_row):
+    row = ""
+    for col in range(SIZE):
+        if revealed_row >> col & 1:
+            row += (REVEALED_BOMB if bombs_row >> col & 1 else REVEALED_CRYSTAL) + " "
+        else:
+            row += CLOSED_CELL + " "
+    return row + "\n"
+
+# Строка поля по 3-битным срезам масок: ROW_RENDERS[bombs_row][revealed_row]
+ROW_RENDERS = [[_render_row(b, r) for r in range(1 << SIZE)] for b in range(1 << SIZE)]
+
+def cell(position):
+    return 1 << position
+
+def position_of(row, col):
+    return row * SIZE + col
+
+def place_bombs(count, rng=random):
+    mask = 0
+    for position in rng.sample(range(CELLS), count):
+        mask |= 1 << position
+    return mask
+
+def is_bomb(bombs, position):
+    return bool(bombs >> position & 1)
+
+def is_revealed(revealed, position):
+    return bool(revealed >> position & 1)
+
+def crystals_found(bombs, revealed):
+    return POPCOUNT[revealed & ~bombs & FULL_MASK]
+
+def closed_bombs(bombs, revealed):
+    return BITS[bombs & ~revealed & FULL_MASK]
+
+def coefficient(bombs_count, crystals):
+    step = BOMB_COEFFICIENT_STEPS.get(bombs_count, BOMB_COEFFICIENT_STEPS[8])
+    return 1.0 + (step * crystals)
+
+def render_board(bombs, revealed):
+    return "".join(
+        ROW_RENDERS[(bombs >> shift) & 0b111][(revealed >> shift) & 0b111]
+        for shift in range(0, CELLS, SIZE)
+    )
@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+# --- LRU-КЭШ ---
+# Ограниченный по размеру словарь: при переполнении вытесняется запись,
+# к которой дольше всего не обращались. Считает попадания и промахи.
+
+class LRUCache:
+    def __init__(self, max_size=10000):
+        self.max_size = max(1, int(max_size))
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def put_if_absent(self, key, value):
+        if key in self._data:
+            return self._data[key]
+        self.put(key, value)
+        return value
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def evict_while(self, predicate):
+        # Записи идут от давно не использованных к свежим
+        evicted = 0
+        while self._data:
+            key, value = next(iter(self._data.items()))
+            if not predicate(key, value):
+                break
+            del self._data[key]
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0,
+        }
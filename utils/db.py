@@ -1,123 +1,236 @@
 import aiosqlite
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from logger_config import setup_logger
-from config import DEFAULT_BALANCE
+from config import (
+    DB_NAME, DB_POOL_SIZE, DB_PRAGMAS,
+    DB_BATCH_MAX_SIZE, DB_BATCH_MAX_DELAY_MS,
+    BALANCE_CACHE_SIZE, DEFAULT_BALANCE
+)
+from utils.pool import ConnectionPool
+from utils.batcher import WriteBatcher
+from utils.cache import LRUCache
+from utils.migrations import run_migrations
 
 logger = setup_logger()
 
-DB_NAME = "economy.db"
+_pool = ConnectionPool(DB_NAME, DB_POOL_SIZE, DB_PRAGMAS)
+_batcher = WriteBatcher(_pool, DB_BATCH_MAX_SIZE, DB_BATCH_MAX_DELAY_MS)
+
+# Кэш балансов (user_id, guild_id) -> balance, сквозная запись через adjust_balance
+_balance_cache = LRUCache(BALANCE_CACHE_SIZE)
 
 # --- ИНИЦИАЛИЗАЦИЯ БД ---
 
-async def init_db():
+async def init_db(db_path=None):
     logger.info("🛠️ Начало инициализации базы данных...")
-    async with aiosqlite.connect(DB_NAME) as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER, guild_id INTEGER, balance INTEGER DEFAULT 100,
-                PRIMARY KEY (user_id, guild_id)
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS bets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER, guild_id INTEGER, event_id INTEGER,
-                choice TEXT, amount INTEGER, coeff REAL
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS saved_events (
-                guild_id INTEGER, event_id INTEGER, data TEXT,
-                PRIMARY KEY (guild_id, event_id)
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS shop_items (
-                item_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER, name TEXT, description TEXT, price INTEGER,
-                item_type TEXT, role_id INTEGER, is_one_time BOOLEAN DEFAULT 1,
-                UNIQUE(guild_id, name)
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS inventory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER, guild_id INTEGER, item_id INTEGER,
-                quantity INTEGER DEFAULT 1,
-                UNIQUE(user_id, guild_id, item_id)
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS one_time_purchases (
-                user_id INTEGER, guild_id INTEGER, item_id INTEGER,
-                PRIMARY KEY (user_id, guild_id, item_id)
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS promo_codes (
-                code TEXT PRIMARY KEY,
-                reward INTEGER NOT NULL,
-                expires_at DATETIME,
-                created_by INTEGER,
-                max_uses INTEGER DEFAULT NULL
-            )
-        """)
+    if db_path:
+        _pool.path = db_path
+    await _pool.open()
 
-        try:
-            await db.execute("ALTER TABLE promo_codes ADD COLUMN max_uses INTEGER DEFAULT NULL")
-        except aiosqlite.OperationalError:
-            pass
-
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS promo_redemptions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                code TEXT NOT NULL,
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                redeemed_at DATETIME,
-                UNIQUE(code, user_id, guild_id),
-                FOREIGN KEY (code) REFERENCES promo_codes(code)
-            )
-        """)
-        await db.commit()
+    settings = await _pool.effective_pragmas()
+    logger.info("⚙️ [DB] PRAGMA: " + ", ".join(f"{name}={value}" for name, value in settings.items()))
+
+    await run_migrations(_pool)
     
     logger.info("✅ База данных инициализирована успешно")
 
+async def close_db():
+    await _batcher.close()
+    await _pool.close()
+    logger.info(f"📊 [DB] Статистика пачек записи: {_batcher.stats()}")
+    logger.info(f"📊 [DB] Статистика кэша балансов: {_balance_cache.stats()}")
+
+def get_batch_stats():
+    return _batcher.stats()
+
+def get_cache_stats():
+    return _balance_cache.stats()
+
+async def trace_queries(callback):
+    await _pool.set_trace_callback(callback)
+
 # --- УПРАВЛЕНИЕ БАЛАНСОМ ---
 
 async def get_balance(user_id, guild_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    key = (user_id, guild_id)
+    cached = _balance_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async with _pool.read() as db:
         cursor = await db.execute("SELECT balance FROM users WHERE user_id = ? AND guild_id = ?", (user_id, guild_id))
         row = await cursor.fetchone()
-        if not row:
-            await db.execute("INSERT INTO users (user_id, guild_id, balance) VALUES (?, ?, ?)", (user_id, guild_id, DEFAULT_BALANCE))
-            await db.commit()
-            return DEFAULT_BALANCE
-        return row[0]
+    if row:
+        # Параллельный adjust_balance мог уже положить более свежее значение
+        return _balance_cache.put_if_absent(key, row[0])
 
-async def update_balance(user_id, guild_id, amount):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
+        await db.execute("INSERT OR IGNORE INTO users (user_id, guild_id, balance) VALUES (?, ?, ?)", (user_id, guild_id, DEFAULT_BALANCE))
         cursor = await db.execute("SELECT balance FROM users WHERE user_id = ? AND guild_id = ?", (user_id, guild_id))
+        balance = (await cursor.fetchone())[0]
+    return _balance_cache.put_if_absent(key, balance)
+
+async def adjust_balance(user_id, guild_id, delta):
+    delta = int(delta)
+
+    async def op(db):
+        cursor = await db.execute("""
+            INSERT INTO users (user_id, guild_id, balance) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET balance = balance + ?
+            RETURNING balance
+        """, (user_id, guild_id, DEFAULT_BALANCE + delta, delta))
+        return (await cursor.fetchone())[0]
+
+    new_balance = await _batcher.submit(op)
+    _balance_cache.put((user_id, guild_id), new_balance)
+
+    if delta > 0:
+        logger.info(f"💳 [DB] Баланс изменен: Пользователь {user_id} получил {delta} Лоресиков")
+    else:
+        logger.info(f"💳 [DB] Баланс изменен: У пользователя {user_id} списано {abs(delta)} Лоресиков")
+    return new_balance
+
+async def update_balance(user_id, guild_id, amount):
+    return await adjust_balance(user_id, guild_id, amount)
+
+async def transfer(sender_id, receiver_id, guild_id, amount):
+    amount = int(amount)
+
+    async def op(db):
+        await db.execute("INSERT OR IGNORE INTO users (user_id, guild_id, balance) VALUES (?, ?, ?)", (sender_id, guild_id, DEFAULT_BALANCE))
+        cursor = await db.execute(
+            "UPDATE users SET balance = balance - ? WHERE user_id = ? AND guild_id = ? AND balance >= ? RETURNING balance",
+            (amount, sender_id, guild_id, amount)
+        )
         row = await cursor.fetchone()
-        
         if not row:
-            new_balance = 100 + int(amount)
-            await db.execute("INSERT INTO users (user_id, guild_id, balance) VALUES (?, ?, ?)", (user_id, guild_id, new_balance))
-        else:
-            await db.execute("UPDATE users SET balance = balance + ? WHERE user_id = ? AND guild_id = ?", (int(amount), user_id, guild_id))
-        
-        await db.commit()
-        
-    if amount > 0:
-        logger.info(f"💳 [DB] Баланс изменен: Пользователь {user_id} получил {amount} Лоресиков")
-    else:
-        logger.info(f"💳 [DB] Баланс изменен: У пользователя {user_id} списано {abs(amount)} Лоресиков")
+            return None
+
+        cursor = await db.execute("""
+            INSERT INTO users (user_id, guild_id, balance) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET balance = balance + ?
+            RETURNING balance
+        """, (receiver_id, guild_id, DEFAULT_BALANCE + amount, amount))
+        return row[0], (await cursor.fetchone())[0]
+
+    result = await _batcher.submit(op)
+    if result is None:
+        logger.info(f"💳 [DB] Перевод отклонён: у пользователя {sender_id} недостаточно средств для {amount} Лоресиков")
+        return None
+
+    sender_balance, receiver_balance = result
+    _balance_cache.put((sender_id, guild_id), sender_balance)
+    _balance_cache.put((receiver_id, guild_id), receiver_balance)
+    logger.info(f"💳 [DB] Перевод: {sender_id} -> {receiver_id} ({amount} Лоресиков)")
+    return sender_balance, receiver_balance
+
+# --- ИГРА «БОМБЫ» ---
+
+async def start_bomb_game(user_id, guild_id, bet, bombs_count, bombs_mask):
+    bet = int(bet)
+
+    async def op(db):
+        cursor = await db.execute("""
+            INSERT INTO users (user_id, guild_id, balance) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET balance = balance - ?
+            RETURNING balance
+        """, (user_id, guild_id, DEFAULT_BALANCE - bet, bet))
+        new_balance = (await cursor.fetchone())[0]
+        cursor = await db.execute(
+            "INSERT INTO bomb_games (user_id, guild_id, bet, bombs_count, bombs_mask, revealed_mask, created_at) VALUES (?, ?, ?, ?, ?, 0, ?)",
+            (user_id, guild_id, bet, bombs_count, bombs_mask, datetime.now().isoformat())
+        )
+        return cursor.lastrowid, new_balance
+
+    game_id, new_balance = await _batcher.submit(op)
+    _balance_cache.put((user_id, guild_id), new_balance)
+    logger.info(f"💣 [DB] Бомбы: Игра #{game_id} пользователя {user_id} сохранена, списано {bet} Лоресиков")
+    return game_id, new_balance
+
+async def get_bomb_game(game_id):
+    async with _pool.read() as db:
+        cursor = await db.execute(
+            "SELECT game_id, user_id, guild_id, bet, bombs_count, bombs_mask, revealed_mask FROM bomb_games WHERE game_id = ?",
+            (game_id,)
+        )
+        return await cursor.fetchone()
+
+async def update_bomb_game(game_id, revealed_mask):
+    async def op(db):
+        await db.execute("UPDATE bomb_games SET revealed_mask = ? WHERE game_id = ?", (revealed_mask, game_id))
+
+    await _batcher.submit(op)
+
+async def delete_bomb_game(game_id):
+    async def op(db):
+        cursor = await db.execute("DELETE FROM bomb_games WHERE game_id = ? RETURNING game_id", (game_id,))
+        return await cursor.fetchone() is not None
+
+    return await _batcher.submit(op)
+
+async def expire_bomb_games(max_age_seconds):
+    # Игры старше max_age_seconds удаляются, ставка сгорает (как раньше по таймауту кнопок)
+    cutoff = (datetime.now() - timedelta(seconds=max_age_seconds)).isoformat()
+
+    async def op(db):
+        cursor = await db.execute(
+            "DELETE FROM bomb_games WHERE created_at < ? RETURNING game_id, user_id, guild_id, bet",
+            (cutoff,)
+        )
+        return await cursor.fetchall()
+
+    rows = await _batcher.submit(op)
+    if rows:
+        logger.info(f"💣 [DB] Бомбы: удалено брошенных игр: {len(rows)}, сгорело {sum(row[3] for row in rows)} Лоресиков")
+    return rows
+
+async def finish_bomb_game(game_id, payout):
+    # Удаление игры и выплата в одной операции: повторное нажатие не заплатит дважды
+    payout = int(payout)
+
+    async def op(db):
+        cursor = await db.execute("DELETE FROM bomb_games WHERE game_id = ? RETURNING user_id, guild_id", (game_id,))
+        row = await cursor.fetchone()
+        if not row:
+            return None
+        user_id, guild_id = row
+        cursor = await db.execute("""
+            INSERT INTO users (user_id, guild_id, balance) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET balance = balance + ?
+            RETURNING balance
+        """, (user_id, guild_id, DEFAULT_BALANCE + payout, payout))
+        return user_id, guild_id, (await cursor.fetchone())[0]
+
+    result = await _batcher.submit(op)
+    if result is None:
+        return None
+
+    user_id, guild_id, new_balance = result
+    _balance_cache.put((user_id, guild_id), new_balance)
+    logger.info(f"💣 [DB] Бомбы: Игра #{game_id} завершена, пользователь {user_id} получил {payout} Лоресиков")
+    return new_balance
+
+# --- СЕРИИ ИГРОКОВ ---
+
+async def get_streak(user_id, guild_id):
+    async with _pool.read() as db:
+        cursor = await db.execute("SELECT streak FROM streaks WHERE user_id = ? AND guild_id = ?", (user_id, guild_id))
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+
+async def save_streaks(rows):
+    # rows: [(user_id, guild_id, streak), ...] — одной транзакцией
+    now = datetime.now().isoformat()
+    async with _pool.write() as db:
+        await db.executemany("""
+            INSERT INTO streaks (user_id, guild_id, streak, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET streak = excluded.streak, updated_at = excluded.updated_at
+        """, [(user_id, guild_id, streak, now) for user_id, guild_id, streak in rows])
 
 # --- УПРАВЛЕНИЕ ТОВАРАМИ ---
 
 async def add_item_to_inventory(user_id, guild_id, item_id, quantity=1):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
         cursor = await db.execute(
             "SELECT quantity FROM inventory WHERE user_id = ? AND guild_id = ? AND item_id = ?",
             (user_id, guild_id, item_id)
@@ -134,11 +247,10 @@ async def add_item_to_inventory(user_id, guild_id, item_id, quantity=1):
                 "INSERT INTO inventory (user_id, guild_id, item_id, quantity) VALUES (?, ?, ?, ?)",
                 (user_id, guild_id, item_id, quantity)
             )
-        await db.commit()
     logger.info(f"📦 [DB] Инвентарь: Пользователю {user_id} добавлен предмет ID {item_id} ({quantity} шт.)")
 
 async def remove_item_from_inventory(user_id, guild_id, item_id, quantity=1):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
         cursor = await db.execute(
             "SELECT quantity FROM inventory WHERE user_id = ? AND guild_id = ? AND item_id = ?",
             (user_id, guild_id, item_id)
@@ -156,13 +268,12 @@ async def remove_item_from_inventory(user_id, guild_id, item_id, quantity=1):
                     "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND guild_id = ? AND item_id = ?",
                     (quantity, user_id, guild_id, item_id)
                 )
-            await db.commit()
             logger.info(f"📦 [DB] Инвентарь: У пользователя {user_id} изъят предмет ID {item_id} ({quantity} шт.)")
             return True
         return False
 
 async def get_user_inventory(user_id, guild_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute("""
             SELECT si.item_id, si.name, si.description, inv.quantity, si.item_type, si.role_id
             FROM inventory inv
@@ -173,7 +284,7 @@ async def get_user_inventory(user_id, guild_id):
         return await cursor.fetchall()
 
 async def get_shop_items(guild_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute(
             "SELECT item_id, name, description, price, item_type, role_id, is_one_time FROM shop_items WHERE guild_id = ? ORDER BY name",
             (guild_id,)
@@ -181,7 +292,7 @@ async def get_shop_items(guild_id):
         return await cursor.fetchall()
 
 async def get_shop_item(item_id, guild_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute(
             "SELECT item_id, name, description, price, item_type, role_id, is_one_time FROM shop_items WHERE item_id = ? AND guild_id = ?",
             (item_id, guild_id)
@@ -189,28 +300,26 @@ async def get_shop_item(item_id, guild_id):
         return await cursor.fetchone()
 
 async def create_shop_item(guild_id, name, description, price, item_type, role_id=None, is_one_time=False):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
         try:
             cursor = await db.execute(
                 "INSERT INTO shop_items (guild_id, name, description, price, item_type, role_id, is_one_time) VALUES (?, ?, ?, ?, ?, ?, ?)",
                 (guild_id, name, description, price, item_type, role_id, is_one_time)
             )
-            await db.commit()
             logger.info(f"🏪 [DB] Магазин: Создан товар '{name}' за {price}")
             return cursor.lastrowid
         except aiosqlite.IntegrityError:
             return None
 
 async def delete_shop_item(item_id, guild_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
         await db.execute("DELETE FROM shop_items WHERE item_id = ? AND guild_id = ?", (item_id, guild_id))
         await db.execute("DELETE FROM inventory WHERE item_id = ? AND guild_id = ?", (item_id, guild_id))
         await db.execute("DELETE FROM one_time_purchases WHERE item_id = ? AND guild_id = ?", (item_id, guild_id))
-        await db.commit()
     logger.info(f"🏪 [DB] Магазин: Удален товар ID {item_id}")
 
 async def is_one_time_purchased(user_id, guild_id, item_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute(
             "SELECT 1 FROM one_time_purchases WHERE user_id = ? AND guild_id = ? AND item_id = ?",
             (user_id, guild_id, item_id)
@@ -218,45 +327,195 @@ async def is_one_time_purchased(user_id, guild_id, item_id):
         return await cursor.fetchone() is not None
 
 async def mark_one_time_purchased(user_id, guild_id, item_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
         await db.execute(
             "INSERT OR IGNORE INTO one_time_purchases (user_id, guild_id, item_id) VALUES (?, ?, ?)",
             (user_id, guild_id, item_id)
         )
-        await db.commit()
 
 # --- УПРАВЛЕНИЕ СОБЫТИЯМИ ---
 
-async def load_events_from_db():
-    events_dict = {}
-    async with aiosqlite.connect(DB_NAME) as db:
-        cursor = await db.execute("SELECT guild_id, event_id, data FROM saved_events")
-        rows = await cursor.fetchall()
-        for g_id, e_id, data_str in rows:
-            if g_id not in events_dict: 
-                events_dict[g_id] = {}
-            events_dict[g_id][int(e_id)] = json.loads(data_str)
-    
-    total_events = sum(len(events) for events in events_dict.values())        
-    logger.info(f"📅 Загружено {total_events} событий из БД")
-    return events_dict
+def _build_event(event_type, title, locked):
+    event = {"type": event_type, "title": title, "options": {}, "pools": {}, "locked": bool(locked)}
+    if event_type == "match":
+        event["rosters"] = {}
+    return event
+
+async def load_guild_events(guild_id):
+    guild_events = {}
+    async with _pool.read() as db:
+        cursor = await db.execute("""
+            SELECT e.event_id, e.type, e.title, e.locked, o.option_key, o.name, o.coeff, o.roster,
+                   p.stake_sum, p.bet_count, p.bettors
+            FROM events e
+            LEFT JOIN event_options o ON o.guild_id = e.guild_id AND o.event_id = e.event_id
+            LEFT JOIN bet_pools p ON p.guild_id = o.guild_id AND p.event_id = o.event_id AND p.option_key = o.option_key
+            WHERE e.guild_id = ?
+            ORDER BY e.event_id, o.position
+        """, (guild_id,))
+        for e_id, e_type, title, locked, key, name, coeff, roster, stake, bets, bettors in await cursor.fetchall():
+            event = guild_events.get(e_id)
+            if event is None:
+                event = guild_events[e_id] = _build_event(e_type, title, locked)
+            if key is not None:
+                event["options"][key] = {"name": name, "coeff": coeff}
+                event["pools"][key] = (stake or 0, bets or 0, bettors or 0)
+                if "rosters" in event:
+                    event["rosters"][name] = roster or ""
+
+    logger.debug(f"📅 Загружено {len(guild_events)} событий сервера {guild_id}")
+    return guild_events
+
+async def get_event_list(guild_id):
+    async with _pool.read() as db:
+        cursor = await db.execute(
+            "SELECT event_id, title, locked FROM events WHERE guild_id = ? ORDER BY event_id",
+            (guild_id,)
+        )
+        return await cursor.fetchall()
+
+async def allocate_event_id(guild_id):
+    async def op(db):
+        cursor = await db.execute("""
+            INSERT INTO event_counters (guild_id, last_id) VALUES (?, 1)
+            ON CONFLICT(guild_id) DO UPDATE SET last_id = last_id + 1
+            RETURNING last_id
+        """, (guild_id,))
+        return (await cursor.fetchone())[0]
+
+    return await _batcher.submit(op)
 
 async def save_event(guild_id, event_id, event_data):
-    async with aiosqlite.connect(DB_NAME) as db:
+    rosters = event_data.get("rosters", {})
+    async with _pool.write() as db:
         await db.execute(
-            "INSERT OR REPLACE INTO saved_events VALUES (?, ?, ?)", 
-            (guild_id, event_id, json.dumps(event_data, ensure_ascii=False))
+            "INSERT OR REPLACE INTO events (guild_id, event_id, type, title, locked, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, event_id, event_data.get("type"), event_data["title"], int(event_data.get("locked", False)), datetime.now().isoformat())
+        )
+        await db.execute("DELETE FROM event_options WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
+        await db.executemany(
+            "INSERT INTO event_options (guild_id, event_id, option_key, name, coeff, position, roster) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (guild_id, event_id, key, option["name"], option["coeff"], position, rosters.get(option["name"]))
+                for position, (key, option) in enumerate(event_data["options"].items())
+            ]
         )
-        await db.commit()
+
+async def set_event_locked(guild_id, event_id, locked):
+    async with _pool.write() as db:
+        cursor = await db.execute(
+            "UPDATE events SET locked = ? WHERE guild_id = ? AND event_id = ?",
+            (int(locked), guild_id, event_id)
+        )
+        return cursor.rowcount > 0
 
 async def delete_event(guild_id, event_id):
-    async with aiosqlite.connect(DB_NAME) as db:
-        await db.execute("DELETE FROM saved_events WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
+    async with _pool.write() as db:
+        await db.execute("DELETE FROM events WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
+        await db.execute("DELETE FROM event_options WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
+        await db.execute("DELETE FROM bet_pools WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
+        await db.execute("DELETE FROM bets WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
+
+def pool_coefficient(total, stake, rake):
+    # Кэф тотализатора; округление вниз — банк не должен уйти в минус
+    if not stake:
+        return None
+    return int(total * (1 - rake) / stake * 100) / 100
+
+async def settle_event(guild_id, event_id, winner_key, title=None, pool_rake=None):
+    # pool_rake задан — тотализатор: общий кэф считается из bet_pools внутри
+    # транзакции расчёта (ставка, принятая до неё, уже в банке). Иначе
+    # каждой ставке платится её кэф. Возвращает (победители, кэф тотализатора).
+    coeff = None
+    async with _pool.write() as db:
+        if pool_rake is not None:
+            cursor = await db.execute("""
+                SELECT SUM(stake_sum), SUM(CASE WHEN option_key = ? THEN stake_sum ELSE 0 END)
+                FROM bet_pools WHERE guild_id = ? AND event_id = ?
+            """, (winner_key, guild_id, event_id))
+            total, stake = await cursor.fetchone()
+            coeff = pool_coefficient(total or 0, stake or 0, pool_rake)
+
+        cursor = await db.execute(
+            "SELECT user_id, CAST(amount * COALESCE(?, coeff) AS INTEGER) FROM bets WHERE guild_id = ? AND event_id = ? AND choice = ?",
+            (coeff, guild_id, event_id, winner_key)
+        )
+        winners = await cursor.fetchall()
+
+        balances = []
+        if winners:
+            await db.execute("""
+                INSERT OR IGNORE INTO users (user_id, guild_id, balance)
+                SELECT DISTINCT user_id, guild_id, ? FROM bets
+                WHERE guild_id = ? AND event_id = ? AND choice = ?
+            """, (DEFAULT_BALANCE, guild_id, event_id, winner_key))
+            cursor = await db.execute("""
+                UPDATE users SET balance = users.balance + payouts.total
+                FROM (
+                    SELECT user_id, SUM(CAST(amount * COALESCE(?, coeff) AS INTEGER)) AS total FROM bets
+                    WHERE guild_id = ? AND event_id = ? AND choice = ?
+                    GROUP BY user_id
+                ) AS payouts
+                WHERE users.user_id = payouts.user_id AND users.guild_id = ?
+                RETURNING users.user_id, users.balance
+            """, (coeff, guild_id, event_id, winner_key, guild_id))
+            balances = await cursor.fetchall()
+
+            # Уведомления победителям — в той же транзакции, одно на игрока
+            await db.execute("""
+                INSERT INTO notifications (user_id, guild_id, event_id, title, amount, created_at)
+                SELECT user_id, guild_id, event_id, ?, SUM(CAST(amount * COALESCE(?, coeff) AS INTEGER)), ? FROM bets
+                WHERE guild_id = ? AND event_id = ? AND choice = ?
+                GROUP BY user_id
+                ON CONFLICT(user_id, guild_id, event_id) DO UPDATE SET amount = amount + excluded.amount
+            """, (title, coeff, datetime.now().isoformat(), guild_id, event_id, winner_key))
+
+        await db.execute("DELETE FROM events WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
+        await db.execute("DELETE FROM event_options WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
+        await db.execute("DELETE FROM bet_pools WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
         await db.execute("DELETE FROM bets WHERE guild_id = ? AND event_id = ?", (guild_id, event_id))
-        await db.commit()
+
+    for user_id, balance in balances:
+        _balance_cache.put((user_id, guild_id), balance)
+
+    logger.info(f"🏆 [DB] Событие {event_id} рассчитано: выигрышных ставок {len(winners)}, выплачено {sum(p for _, p in winners)} Лоресиков")
+    return winners, coeff
+
+# --- ОЧЕРЕДЬ УВЕДОМЛЕНИЙ ---
+
+async def get_due_notifications(now, limit=50):
+    async with _pool.read() as db:
+        cursor = await db.execute("""
+            SELECT id, user_id, guild_id, event_id, title, amount, attempts FROM notifications
+            WHERE next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?
+        """, (now, limit))
+        return await cursor.fetchall()
+
+async def delete_notification(notification_id):
+    async def op(db):
+        await db.execute("DELETE FROM notifications WHERE id = ?", (notification_id,))
+
+    await _batcher.submit(op)
+
+async def reschedule_notification(notification_id, next_attempt_at, count_attempt=True):
+    async def op(db):
+        await db.execute(
+            "UPDATE notifications SET attempts = attempts + ?, next_attempt_at = ? WHERE id = ?",
+            (int(count_attempt), next_attempt_at, notification_id)
+        )
+
+    await _batcher.submit(op)
+
+async def get_bet_pools(guild_id, event_id):
+    async with _pool.read() as db:
+        cursor = await db.execute(
+            "SELECT option_key, stake_sum, bet_count, bettors FROM bet_pools WHERE guild_id = ? AND event_id = ?",
+            (guild_id, event_id)
+        )
+        return {key: (stake, bets, bettors) for key, stake, bets, bettors in await cursor.fetchall()}
 
 async def get_event_bets(guild_id, event_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         async with db.execute(
             "SELECT user_id, amount, choice FROM bets WHERE guild_id = ? AND event_id = ?",
             (guild_id, event_id)
@@ -264,17 +523,33 @@ async def get_event_bets(guild_id, event_id):
             return await cursor.fetchall()
 
 async def place_bet(user_id, guild_id, event_id, choice, amount, coeff):
-    async with aiosqlite.connect(DB_NAME) as db:
+    # Ставка и пул варианта обновляются вместе; возвращает (сумма, ставок, игроков)
+    async def op(db):
+        cursor = await db.execute(
+            "SELECT 1 FROM bets WHERE guild_id = ? AND event_id = ? AND choice = ? AND user_id = ? LIMIT 1",
+            (guild_id, event_id, choice, user_id)
+        )
+        new_bettor = await cursor.fetchone() is None
         await db.execute(
             "INSERT INTO bets (user_id, guild_id, event_id, choice, amount, coeff) VALUES (?, ?, ?, ?, ?, ?)",
             (user_id, guild_id, event_id, choice, amount, coeff)
         )
-        await db.commit()
+        cursor = await db.execute("""
+            INSERT INTO bet_pools (guild_id, event_id, option_key, stake_sum, bet_count, bettors) VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT(guild_id, event_id, option_key) DO UPDATE SET
+                stake_sum = stake_sum + excluded.stake_sum,
+                bet_count = bet_count + 1,
+                bettors = bettors + excluded.bettors
+            RETURNING stake_sum, bet_count, bettors
+        """, (guild_id, event_id, choice, amount, int(new_bettor)))
+        return tuple(await cursor.fetchone())
+
+    return await _batcher.submit(op)
 
 # --- УПРАВЛЕНИЕ ПРОМОКОДАМИ ---
 
 async def get_promo(code):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute(
             "SELECT reward, expires_at, max_uses FROM promo_codes WHERE code = ?",
             (code,)
@@ -282,31 +557,29 @@ async def get_promo(code):
         return await cursor.fetchone()
 
 async def create_promo(code, reward, expires_at, created_by, max_uses):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
         try:
             await db.execute(
                 "INSERT INTO promo_codes (code, reward, expires_at, created_by, max_uses) VALUES (?, ?, ?, ?, ?)",
                 (code, reward, expires_at, created_by, max_uses)
             )
-            await db.commit()
             return True
         except aiosqlite.IntegrityError:
             return False
 
 async def delete_promo(code):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
         await db.execute("DELETE FROM promo_codes WHERE code = ?", (code,))
-        await db.commit()
 
 async def get_all_promos():
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute(
             "SELECT code, reward, expires_at, created_by, max_uses FROM promo_codes ORDER BY code"
         )
         return await cursor.fetchall()
 
 async def check_promo_redemption(code, user_id, guild_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute(
             "SELECT 1 FROM promo_redemptions WHERE code = ? AND user_id = ? AND guild_id = ?",
             (code, user_id, guild_id)
@@ -314,19 +587,18 @@ async def check_promo_redemption(code, user_id, guild_id):
         return await cursor.fetchone() is not None
 
 async def add_promo_redemption(code, user_id, guild_id):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.write() as db:
         try:
             await db.execute(
                 "INSERT INTO promo_redemptions (code, user_id, guild_id, redeemed_at) VALUES (?, ?, ?, ?)",
                 (code, user_id, guild_id, datetime.now().isoformat())
             )
-            await db.commit()
             return True
         except aiosqlite.IntegrityError:
             return False
 
 async def get_promo_use_count(code):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute(
             "SELECT COUNT(*) FROM promo_redemptions WHERE code = ?",
             (code,)
@@ -334,7 +606,7 @@ async def get_promo_use_count(code):
         return (await cursor.fetchone())[0]
 
 async def get_user_top(guild_id, limit=10):
-    async with aiosqlite.connect(DB_NAME) as db:
+    async with _pool.read() as db:
         cursor = await db.execute(
             "SELECT user_id, balance FROM users WHERE guild_id = ? ORDER BY balance DESC LIMIT ?",
             (guild_id, limit)
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+# --- БЛОКИРОВКИ СЧЕТОВ ---
+# Проверка баланса и списание разделены await'ами, поэтому две команды
+# одного игрока могут обе пройти проверку. AccountLocks выдаёт
+# asyncio.Lock на (user_id, guild_id): блокировка создаётся при первом
+# обращении и пропадает из WeakValueDictionary, как только её никто не
+# держит. Несколько счетов берутся в отсортированном порядке — без
+# взаимных блокировок между /pay навстречу друг другу.
+
+class AccountLocks:
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+        self.acquired = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _get(self, key):
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    @asynccontextmanager
+    async def hold(self, *keys):
+        # Сильные ссылки на время удержания, иначе блокировку соберёт GC
+        locks = [self._get(key) for key in sorted(set(keys))]
+        taken = []
+        start = time.perf_counter()
+        try:
+            for lock in locks:
+                if lock.locked():
+                    self.contended += 1
+                await lock.acquire()
+                taken.append(lock)
+
+            wait = time.perf_counter() - start
+            self.acquired += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            yield
+        finally:
+            for lock in reversed(taken):
+                lock.release()
+
+    def stats(self):
+        return {
+            "live_locks": len(self._locks),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "wait_avg_ms": round(self.wait_total / self.acquired * 1000, 3) if self.acquired else 0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+account_locks = AccountLocks()
+
+def lock_account(user_id, guild_id):
+    """Блокировка счёта на проверку баланса и списание.
+
+    Внутри — только работа с БД: ответы Discord (defer, send_message,
+    followup) отправляются до или после блокировки, иначе медленный или
+    упёршийся в 429 ответ задержит все операции со счётом игрока.
+    """
+    return account_locks.hold((user_id, guild_id))
+
+def lock_accounts(guild_id, *user_ids):
+    return account_locks.hold(*[(user_id, guild_id) for user_id in user_ids])
+
+def get_lock_stats():
+    return account_locks.stats()
@@ -0,0 +1,281 @@
+import aiosqlite
+import json
+from datetime import datetime
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# --- МИГРАЦИИ СХЕМЫ ---
+# Каждая миграция — (версия, название, шаги). Шаг — это SQL-строка или
+# async-функция, принимающая соединение. Все недостающие миграции
+# применяются одной транзакцией, номер версии пишется в schema_version.
+# Шаги должны быть идемпотентными: на старых базах часть таблиц уже есть.
+# Новые изменения схемы добавляются только в конец списка.
+
+async def _column_exists(db, table, column):
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in await cursor.fetchall())
+
+async def _promo_max_uses(db):
+    if not await _column_exists(db, "promo_codes", "max_uses"):
+        await db.execute("ALTER TABLE promo_codes ADD COLUMN max_uses INTEGER DEFAULT NULL")
+
+async def _events_from_json(db):
+    cursor = await db.execute("SELECT guild_id, event_id, data FROM saved_events")
+    rows = await cursor.fetchall()
+    now = datetime.now().isoformat()
+    for guild_id, event_id, data in rows:
+        event = json.loads(data)
+        rosters = event.get("rosters", {})
+        await db.execute(
+            "INSERT OR REPLACE INTO events (guild_id, event_id, type, title, locked, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, int(event_id), event.get("type"), event.get("title"), int(bool(event.get("locked"))), now)
+        )
+        await db.executemany(
+            "INSERT OR REPLACE INTO event_options (guild_id, event_id, option_key, name, coeff, position, roster) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (guild_id, int(event_id), key, option["name"], option["coeff"], position, rosters.get(option["name"]))
+                for position, (key, option) in enumerate(event.get("options", {}).items())
+            ]
+        )
+    await db.execute("DROP TABLE saved_events")
+    logger.info(f"🧬 [DB] Перенесено событий из JSON: {len(rows)}")
+
+MIGRATIONS = [
+    (1, "Базовая схема", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER, guild_id INTEGER, balance INTEGER DEFAULT 100,
+            PRIMARY KEY (user_id, guild_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS bets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER, guild_id INTEGER, event_id INTEGER,
+            choice TEXT, amount INTEGER, coeff REAL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS saved_events (
+            guild_id INTEGER, event_id INTEGER, data TEXT,
+            PRIMARY KEY (guild_id, event_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS shop_items (
+            item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER, name TEXT, description TEXT, price INTEGER,
+            item_type TEXT, role_id INTEGER, is_one_time BOOLEAN DEFAULT 1,
+            UNIQUE(guild_id, name)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS inventory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER, guild_id INTEGER, item_id INTEGER,
+            quantity INTEGER DEFAULT 1,
+            UNIQUE(user_id, guild_id, item_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS one_time_purchases (
+            user_id INTEGER, guild_id INTEGER, item_id INTEGER,
+            PRIMARY KEY (user_id, guild_id, item_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS promo_codes (
+            code TEXT PRIMARY KEY,
+            reward INTEGER NOT NULL,
+            expires_at DATETIME,
+            created_by INTEGER,
+            max_uses INTEGER DEFAULT NULL
+        )
+        """,
+        _promo_max_uses,
+        """
+        CREATE TABLE IF NOT EXISTS promo_redemptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            redeemed_at DATETIME,
+            UNIQUE(code, user_id, guild_id),
+            FOREIGN KEY (code) REFERENCES promo_codes(code)
+        )
+        """,
+    ]),
+    # Проверка планов: tools/explain_queries.py
+    (2, "Индексы горячих запросов", [
+        "CREATE INDEX IF NOT EXISTS idx_users_guild_balance ON users (guild_id, balance DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_bets_event ON bets (guild_id, event_id, choice)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_guild_item ON inventory (guild_id, item_id)",
+        "CREATE INDEX IF NOT EXISTS idx_one_time_guild_item ON one_time_purchases (guild_id, item_id)",
+    ]),
+    # Незавершённые игры «Бомбы»: поле и открытые клетки — 9-битные маски
+    (3, "Сохранение игр «Бомбы»", [
+        """
+        CREATE TABLE IF NOT EXISTS bomb_games (
+            game_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            bet INTEGER NOT NULL,
+            bombs_count INTEGER NOT NULL,
+            bombs_mask INTEGER NOT NULL,
+            revealed_mask INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME
+        )
+        """,
+    ]),
+    # Серии проигрышей для жалости в играх, см. utils/streaks.py
+    (4, "Серии игроков", [
+        """
+        CREATE TABLE IF NOT EXISTS streaks (
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            streak INTEGER NOT NULL DEFAULT 0,
+            updated_at DATETIME,
+            PRIMARY KEY (user_id, guild_id)
+        )
+        """,
+    ]),
+    # Очередь личных сообщений о выигрышах: одна строка на игрока и событие
+    (5, "Очередь уведомлений", [
+        """
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            title TEXT,
+            amount INTEGER NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            created_at DATETIME,
+            UNIQUE(user_id, guild_id, event_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_notifications_due ON notifications (next_attempt_at)",
+    ]),
+    # Номера событий выдаются счётчиком и больше не повторяются после /settle
+    (6, "Счётчики событий", [
+        """
+        CREATE TABLE IF NOT EXISTS event_counters (
+            guild_id INTEGER PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO event_counters (guild_id, last_id)
+        SELECT guild_id, MAX(event_id) FROM (
+            SELECT guild_id, event_id FROM saved_events
+            UNION ALL SELECT guild_id, event_id FROM bets
+            UNION ALL SELECT guild_id, event_id FROM notifications
+        )
+        WHERE guild_id IS NOT NULL AND event_id IS NOT NULL
+        GROUP BY guild_id
+        """,
+    ]),
+    # События по колонкам вместо JSON в saved_events
+    (7, "Нормализованные события", [
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            guild_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            type TEXT,
+            title TEXT,
+            locked INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME,
+            PRIMARY KEY (guild_id, event_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS event_options (
+            guild_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            option_key TEXT NOT NULL,
+            name TEXT,
+            coeff REAL,
+            position INTEGER NOT NULL DEFAULT 0,
+            roster TEXT,
+            PRIMARY KEY (guild_id, event_id, option_key)
+        )
+        """,
+        _events_from_json,
+    ]),
+    # Суммы ставок по вариантам ведутся в place_bet, без чтения всех bets
+    (8, "Пулы ставок", [
+        """
+        CREATE TABLE IF NOT EXISTS bet_pools (
+            guild_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            option_key TEXT NOT NULL,
+            stake_sum INTEGER NOT NULL DEFAULT 0,
+            bet_count INTEGER NOT NULL DEFAULT 0,
+            bettors INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, event_id, option_key)
+        )
+        """,
+        """
+        INSERT OR REPLACE INTO bet_pools (guild_id, event_id, option_key, stake_sum, bet_count, bettors)
+        SELECT guild_id, event_id, choice, SUM(amount), COUNT(*), COUNT(DISTINCT user_id) FROM bets
+        WHERE guild_id IS NOT NULL AND event_id IS NOT NULL AND choice IS NOT NULL
+        GROUP BY guild_id, event_id, choice
+        """,
+        # Проверка «новый ли игрок в пуле» — по индексу, а не перебором ставок варианта
+        "CREATE INDEX IF NOT EXISTS idx_bets_bettor ON bets (guild_id, event_id, choice, user_id)",
+        "DROP INDEX IF EXISTS idx_bets_event",
+    ]),
+    # Очистка брошенных игр «Бомбы» по времени создания
+    (9, "Индекс возраста игр Бомбы", [
+        "CREATE INDEX IF NOT EXISTS idx_bomb_games_created ON bomb_games (created_at)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+async def _current_version(db):
+    try:
+        cursor = await db.execute("SELECT MAX(version) FROM schema_version")
+    except aiosqlite.OperationalError:
+        return 0
+    row = await cursor.fetchone()
+    return row[0] or 0
+
+async def run_migrations(pool):
+    async with pool.read() as db:
+        current = await _current_version(db)
+
+    if current >= LATEST_VERSION:
+        logger.info(f"🧬 [DB] Схема актуальна (версия {current})")
+        return current
+
+    async with pool.write() as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT,
+                applied_at DATETIME
+            )
+        """)
+        current = await _current_version(db)
+
+        for version, name, steps in MIGRATIONS:
+            if version <= current:
+                continue
+
+            for step in steps:
+                if callable(step):
+                    await step(db)
+                else:
+                    await db.execute(step)
+
+            await db.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().isoformat())
+            )
+            logger.info(f"🧬 [DB] Применена миграция {version}: {name}")
+
+    logger.info(f"🧬 [DB] Схема обновлена: версия {current} -> {LATEST_VERSION}")
+    return LATEST_VERSION
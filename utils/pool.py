@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import asynccontextmanager
+import aiosqlite
+from logger_config import setup_logger
+
+logger = setup_logger()
+
+# --- ПУЛ СОЕДИНЕНИЙ ---
+# Соединения открываются один раз и живут всё время работы бота.
+# Чтения разбираются из очереди читателей, все записи идут через
+# единственное соединение-писатель под замком (SQLite допускает только
+# одного писателя одновременно).
+
+class ConnectionPool:
+    def __init__(self, path, size=4, pragmas=None):
+        self.path = path
+        self.size = max(1, int(size))
+        self.pragmas = dict(pragmas or {})
+        self._readers = None
+        self._reader_conns = []
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+
+    @property
+    def is_open(self):
+        return self._writer is not None
+
+    async def _connect(self):
+        # isolation_level=None: транзакции открываются явно в write()
+        conn = await aiosqlite.connect(self.path, isolation_level=None)
+        for name, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    async def effective_pragmas(self):
+        if not self.is_open:
+            await self.open()
+
+        settings = {}
+        async with self._write_lock:
+            for name in self.pragmas:
+                cursor = await self._writer.execute(f"PRAGMA {name}")
+                row = await cursor.fetchone()
+                settings[name] = row[0] if row else None
+        return settings
+
+    async def set_trace_callback(self, callback):
+        if not self.is_open:
+            await self.open()
+
+        for conn in [self._writer, *self._reader_conns]:
+            await conn.set_trace_callback(callback)
+
+    async def open(self):
+        async with self._open_lock:
+            if self._writer is not None:
+                return
+
+            self._writer = await self._connect()
+            self._readers = asyncio.Queue()
+            for _ in range(self.size):
+                conn = await self._connect()
+                self._reader_conns.append(conn)
+                self._readers.put_nowait(conn)
+
+        logger.info(f"🔌 [DB] Пул соединений открыт: {self.path} (читателей: {self.size}, писателей: 1)")
+
+    async def close(self):
+        async with self._open_lock:
+            if self._writer is None:
+                return
+
+            async with self._write_lock:
+                for conn in self._reader_conns:
+                    await conn.close()
+                await self._writer.close()
+
+            self._reader_conns = []
+            self._readers = None
+            self._writer = None
+
+        logger.info("🔌 [DB] Пул соединений закрыт")
+
+    @asynccontextmanager
+    async def read(self):
+        if not self.is_open:
+            await self.open()
+
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def write(self):
+        if not self.is_open:
+            await self.open()
+
+        async with self._write_lock:
+            db = self._writer
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                await db.execute("ROLLBACK")
+                raise
+            else:
+                await db.execute("COMMIT")
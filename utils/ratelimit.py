@@ -0,0 +1,84 @@
+import time
+from collections import Counter
+from discord import app_commands
+from utils.cache import LRUCache
+from config import RATE_LIMITS, RATE_LIMIT_DEFAULT, RATE_LIMIT_BUCKETS
+
+# --- ОГРАНИЧЕНИЕ ЧАСТОТЫ КОМАНД ---
+# Token bucket на пару (команда, пользователь, сервер): в ведре до
+# `capacity` жетонов, за `period` секунд оно наполняется заново. Каждый
+# вызов забирает жетон; пустое ведро — отказ ещё до запросов к БД.
+# Вёдра живут в LRU-кэше, поэтому память не растёт с числом игроков.
+
+class RateLimited(app_commands.CheckFailure):
+    def __init__(self, command, retry_after):
+        super().__init__(f"Слишком частые вызовы /{command}, повтор через {retry_after:.1f} с")
+        self.command = command
+        self.retry_after = retry_after
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity, period, now):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = now
+
+    def consume(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    def __init__(self, limits=None, default=None, max_buckets=100000):
+        self.limits = dict(limits or {})
+        self.default = default
+        self._buckets = LRUCache(max_buckets)
+        self.allowed = Counter()
+        self.rejected = Counter()
+
+    def hit(self, command, user_id, guild_id, now=None):
+        limit = self.limits.get(command, self.default)
+        if not limit:
+            return 0.0
+
+        now = time.monotonic() if now is None else now
+        key = (command, user_id, guild_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(*limit, now)
+            self._buckets.put(key, bucket)
+
+        retry_after = bucket.consume(now)
+        if retry_after:
+            self.rejected[command] += 1
+        else:
+            self.allowed[command] += 1
+        return retry_after
+
+    def stats(self):
+        return {
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+            "rejected_total": sum(self.rejected.values()),
+            "buckets": self._buckets.stats(),
+        }
+
+_limiter = RateLimiter(RATE_LIMITS, RATE_LIMIT_DEFAULT, RATE_LIMIT_BUCKETS)
+
+def rate_limit(command=None):
+    async def predicate(interaction):
+        name = command or interaction.command.name
+        retry_after = _limiter.hit(name, interaction.user.id, interaction.guild_id)
+        if retry_after:
+            raise RateLimited(name, retry_after)
+        return True
+
+    return app_commands.check(predicate)
+
+def get_rate_limit_stats():
+    return _limiter.stats()
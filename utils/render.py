@@ -0,0 +1,73 @@
+import time
+import discord
+from logger_config import setup_logger
+from utils import bombs as bomb_engine
+
+logger = setup_logger()
+
+# --- КЭШ ОТРИСОВКИ ИГР ---
+# Всё, что не зависит от игрока, считается один раз при загрузке cog:
+# 37 полос рулетки и заготовки embed (заголовок и цвет). По заготовке
+# создаётся новый Embed — это дешевле, чем Embed.copy() (to_dict/from_dict),
+# — и команда дописывает только свои поля. Поле «Бомб» собирается
+# из трёх готовых строк bombs.ROW_RENDERS, отдельная таблица полей не нужна.
+
+ROULETTE_COLORS = {
+    0: "🟢",
+    **{n: "🔴" for n in [1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36]},
+    **{n: "⚫" for n in [2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35]}
+}
+
+ROULETTE_LANES = []
+ROULETTE_RESULTS = []
+EMBED_SKELETONS = {}
+
+def _roulette_lane(res):
+    items = []
+    for i in range(res - 2, res + 3):
+        n = i % 37
+        c = ROULETTE_COLORS[n]
+        if n == res: items.append(f"**[{c}{n}]**")
+        else: items.append(f"{c}{n}")
+    return f"```\n{' — '.join(items)}\n```"
+
+def _embed_skeletons():
+    # name -> (заголовок, цвет)
+    return {
+        "bombs": ("💣 БОМБЫ 💣", discord.Color.purple()),
+        "slots_win": ("🎰 ВЫИГРЫШ!", discord.Color.green()),
+        "slots_lose": ("🎰 КАЗИНО", discord.Color.red()),
+        "roulette_win": ("🎉 ПОБЕДА В РУЛЕТКЕ!", discord.Color.green()),
+        "roulette_lose": ("💀 СТАВКА НЕ СЫГРАЛА", discord.Color.red()),
+        "bombs_lose": ("☠️ ИГРА ОКОНЧЕНА - БОМБА!", discord.Color.red()),
+        "bombs_win": ("🎉 ИГРА ЗАВЕРШЕНА - ПОБЕДА!", discord.Color.green()),
+    }
+
+def warm():
+    if EMBED_SKELETONS:
+        return
+
+    start = time.perf_counter()
+    ROULETTE_LANES.extend(_roulette_lane(n) for n in range(37))
+    ROULETTE_RESULTS.extend(f"{ROULETTE_COLORS[n]} **{n}**" for n in range(37))
+    EMBED_SKELETONS.update(_embed_skeletons())
+    logger.info(f"🎨 Кэш отрисовки готов: {len(ROULETTE_LANES)} полос рулетки, {len(EMBED_SKELETONS)} заготовок embed за {(time.perf_counter() - start) * 1000:.0f} мс")
+
+def roulette_lane(result):
+    if not ROULETTE_LANES:
+        warm()
+    return ROULETTE_LANES[result]
+
+def roulette_result(result):
+    if not ROULETTE_RESULTS:
+        warm()
+    return ROULETTE_RESULTS[result]
+
+def bomb_board(bombs, revealed):
+    return bomb_engine.render_board(bombs, revealed)
+
+def embed(name):
+    if not EMBED_SKELETONS:
+        warm()
+    title, color = EMBED_SKELETONS[name]
+    return discord.Embed(title=title, color=color)
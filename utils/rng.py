@@ -0,0 +1,91 @@
+import os
+import random
+from collections import Counter
+from config import RNG_MODE, RNG_SEED, RNG_BUFFER_SIZE
+
+# --- ГЕНЕРАТОР СЛУЧАЙНЫХ ЧИСЕЛ ДЛЯ ИГР ---
+# У каждой игры свой поток (stream): игры не делят одну
+# последовательность и не трогают глобальный random.
+#   seeded — random.Random с seed "<RNG_SEED>:<игра>", результаты
+#            воспроизводимы (тесты, бенчмарки, симулятор);
+#   secure — os.urandom, читаемый блоками по RNG_BUFFER_SIZE байт.
+# Каждый розыгрыш получает draw id "<поток>-<seed>-<номер>": он пишется в
+# лог вместе с исходом и в подвал embed. В seeded-режиме id и исходы
+# воспроизводятся при повторном прогоне; в secure seed — случайная метка
+# запуска, чтобы id не повторялись после рестарта.
+
+RECIP_BPF = 2 ** -53
+
+class BufferedSecureRandom(random.Random):
+    # Как random.SystemRandom, но байты берутся из заранее заполненного буфера
+    def __init__(self, buffer_size=4096):
+        self.buffer_size = buffer_size
+        self._buffer = b""
+        self._pos = 0
+        self.refills = 0
+        super().__init__()
+
+    def _take(self, n):
+        if self._pos + n > len(self._buffer):
+            self._buffer = os.urandom(max(self.buffer_size, n))
+            self._pos = 0
+            self.refills += 1
+        chunk = self._buffer[self._pos:self._pos + n]
+        self._pos += n
+        return chunk
+
+    def random(self):
+        return (int.from_bytes(self._take(7), "big") >> 3) * RECIP_BPF
+
+    def getrandbits(self, k):
+        if k < 0:
+            raise ValueError("number of bits must be non-negative")
+        numbytes = (k + 7) // 8
+        x = int.from_bytes(self._take(numbytes), "big")
+        return x >> (numbytes * 8 - k)
+
+    def randbytes(self, n):
+        return self._take(n)
+
+    def seed(self, *args, **kwargs):
+        return None
+
+    def getstate(self):
+        raise NotImplementedError("У буферизованного os.urandom нет состояния")
+
+    setstate = getstate
+
+class RNGService:
+    def __init__(self, mode="secure", seed=None, buffer_size=4096):
+        if mode not in ("secure", "seeded"):
+            raise ValueError(f"Неизвестный режим RNG: {mode}")
+        self.mode = mode
+        if seed is None:
+            seed = 0 if mode == "seeded" else int.from_bytes(os.urandom(4), "big")
+        self.seed = seed
+        self.buffer_size = buffer_size
+        self._streams = {}
+        self._draws = Counter()
+
+    def stream(self, name):
+        rng = self._streams.get(name)
+        if rng is None:
+            if self.mode == "seeded":
+                rng = random.Random(f"{self.seed}:{name}")
+            else:
+                rng = BufferedSecureRandom(self.buffer_size)
+            self._streams[name] = rng
+        return rng
+
+    def draw_id(self, name):
+        self._draws[name] += 1
+        return f"{name}-{self.seed:x}-{self._draws[name]}"
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "draws": dict(self._draws),
+            "refills": {name: rng.refills for name, rng in self._streams.items() if isinstance(rng, BufferedSecureRandom)},
+        }
+
+rng_service = RNGService(RNG_MODE, RNG_SEED, RNG_BUFFER_SIZE)
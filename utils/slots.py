@@ -0,0 +1,197 @@
+import random
+from collections import namedtuple
+from functools import lru_cache
+from itertools import product
+
+# --- ДВИЖОК СЛОТОВ 3x5 ---
+# Символы хранятся как небольшие целые коды, поле — кортеж из 15 кодов
+# по строкам (grid[row * 5 + col]). Выплата каждой линии берётся из
+# заранее посчитанной таблицы по индексу пяти кодов линии, поэтому на
+# спин не нужно ни сравнивать эмодзи, ни ходить по PAYTABLE.
+
+SYM_WILD = "👑"
+SYM_SCATTER = "⭐"
+SYM_HIGH = ["💎", "7️⃣"]
+SYM_MID = ["🔔", "🍉", "🍇"]
+SYM_LOW = ["🍋", "🍒", "🍎"]
+SYM_EMPTY = "⬛"
+
+PAYTABLE = {
+    "👑": [0, 0, 5, 20, 100],
+    "⭐": [0, 0, 10, 50, 200],
+    "💎": [0, 0, 4, 15, 50],
+    "7️⃣": [0, 0, 3, 10, 40],
+    "🔔": [0, 0, 3, 8, 30],
+    "🍉": [0, 0, 2, 5, 20],
+    "🍇": [0, 0, 1, 4, 15],
+    "🍋": [0, 0, 1, 2.5, 10],
+    "🍒": [0, 0, 1, 2, 8],
+    "🍎": [0, 0, 1, 1.5, 5],
+}
+
+PAYLINES = [
+    [1, 1, 1, 1, 1], [0, 0, 0, 0, 0], [2, 2, 2, 2, 2],
+    [0, 1, 2, 1, 0], [2, 1, 0, 1, 2],
+    [0, 0, 1, 2, 2], [2, 2, 1, 0, 0],
+]
+
+ROWS = 3
+COLS = 5
+
+SYMBOLS = list(PAYTABLE.keys())
+CODES = {sym: code for code, sym in enumerate(SYMBOLS)}
+WILD = CODES[SYM_WILD]
+PITY_CODES = [CODES[s] for s in SYM_LOW + SYM_MID]
+
+# Позиции клеток каждой линии в плоском поле
+LINE_POSITIONS = [tuple(row * COLS + col for col, row in enumerate(line)) for line in PAYLINES]
+
+def line_index(codes):
+    index = 0
+    for code in codes:
+        index = index * len(SYMBOLS) + code
+    return index
+
+def _match_line(codes):
+    match = codes[0]
+    count = 1
+    for code in codes[1:]:
+        if code == match or code == WILD or match == WILD:
+            count += 1
+            if match == WILD and code != WILD:
+                match = code
+        else:
+            break
+    return match, count
+
+def _build_line_tables():
+    symbols = []
+    counts = []
+    mults = []
+    for codes in product(range(len(SYMBOLS)), repeat=COLS):
+        match, count = _match_line(codes)
+        mult = PAYTABLE[SYMBOLS[match]][count - 1] if count >= 3 else 0
+        if mult > 0:
+            symbols.append(match)
+            counts.append(count)
+            mults.append(mult)
+        else:
+            symbols.append(-1)
+            counts.append(0)
+            mults.append(0)
+    return symbols, counts, mults
+
+# Индекс линии -> (код символа, длина совпадения, множитель); 0 — нет выигрыша
+LINE_SYMBOL, LINE_COUNT, LINE_MULT = _build_line_tables()
+
+SpinResult = namedtuple("SpinResult", "grid total_win lines win_mask")
+# lines: список (номер линии, код символа, длина, выигрыш)
+# win_mask: 15-битная маска клеток, входящих в выигрышные линии
+
+# --- ЛЕНТЫ ---
+
+def get_reels(rng=random):
+    reels = []
+    for _ in range(COLS):
+        strip = [SYM_WILD]*2 + [SYM_SCATTER]*1 + SYM_HIGH*3 + SYM_MID*6 + SYM_LOW*10
+        rng.shuffle(strip)
+        reels.append(strip)
+    return reels
+
+def build_windows(reels):
+    # Для каждой ленты и каждой остановки — три видимых кода подряд
+    windows = []
+    for strip in reels:
+        codes = [CODES[s] for s in strip]
+        windows.append([tuple(codes[(stop + r) % len(codes)] for r in range(ROWS)) for stop in range(len(codes))])
+    return windows
+
+def build_reels(rng=random):
+    # Раскладка лент: Games строит её из своего RNG-сервиса (поток "reels")
+    return build_windows(get_reels(rng))
+
+# --- СПИН И ОЦЕНКА ---
+
+def spin_grid(windows, rng=random):
+    columns = [rng.choice(reel) for reel in windows]
+    return tuple(columns[col][row] for row in range(ROWS) for col in range(COLS))
+
+def force_win_grid(rng=random):
+    grid = [rng.choice(PITY_CODES) for _ in range(ROWS * COLS)]
+    line = rng.choice(PAYLINES)
+    win_sym = rng.choice(PITY_CODES)
+    for i in range(rng.randint(3, 4)):
+        grid[line[i] * COLS + i] = win_sym
+    return tuple(grid)
+
+def evaluate(grid, bet):
+    total_win = 0
+    lines = []
+    win_mask = 0
+    for idx, positions in enumerate(LINE_POSITIONS):
+        key = line_index([grid[p] for p in positions])
+        mult = LINE_MULT[key]
+        if not mult:
+            continue
+        count = LINE_COUNT[key]
+        win = int(bet * mult)
+        total_win += win
+        lines.append((idx, LINE_SYMBOL[key], count, win))
+        for p in positions[:count]:
+            win_mask |= 1 << p
+    return SpinResult(grid, total_win, lines, win_mask)
+
+def evaluate_batch(grids, bet):
+    return [evaluate(grid, bet) for grid in grids]
+
+def spin(bet, windows, rng=random):
+    return evaluate(spin_grid(windows, rng), bet)
+
+def spin_batch(count, bet, windows, rng=random):
+    return evaluate_batch([spin_grid(windows, rng) for _ in range(count)], bet)
+
+# --- СЕРИЯ СПИНОВ С ЖАЛОСТЬЮ ---
+
+def pity_chance(streak):
+    return min(0.70, streak * 0.07) if streak >= 2 else 0
+
+def spin_session(count, bet, windows, streak=0, rng=random):
+    # Обычные спины считаются пачкой; спин, на котором сработала жалость,
+    # заменяется принудительным выигрышем. Возвращает результаты и серию.
+    results = spin_batch(count, bet, windows, rng)
+    for i, result in enumerate(results):
+        if streak >= 2 and rng.random() < pity_chance(streak):
+            result = results[i] = evaluate(force_win_grid(rng), bet)
+        streak = 0 if result.total_win else streak + 1
+    return results, streak
+
+# --- ОТРИСОВКА ---
+
+def grid_codes(grid):
+    # Коды символов поля одной строкой (символов 10, код — одна цифра) — для логов
+    return "".join(map(str, grid))
+
+def describe_line(line):
+    idx, symbol, count, _ = line
+    return f"Линия {idx+1}: {SYMBOLS[symbol]} x{count}"
+
+@lru_cache(maxsize=4096)
+def _board_row(codes):
+    return " | ".join(SYMBOLS[c] for c in codes)
+
+@lru_cache(maxsize=4096)
+def _win_row(codes, mask):
+    return " ".join(SYMBOLS[c] if mask >> col & 1 else SYM_EMPTY for col, c in enumerate(codes))
+
+def render_strip(grid):
+    # Центральная строка поля — для сводки по серии спинов
+    return _board_row(grid[COLS:2 * COLS])
+
+def render_board(grid):
+    return "".join(_board_row(grid[r * COLS:(r + 1) * COLS]) + "\n" for r in range(ROWS))
+
+def render_win_map(grid, win_mask):
+    return "".join(
+        _win_row(grid[r * COLS:(r + 1) * COLS], (win_mask >> (r * COLS)) & 0b11111) + "\n"
+        for r in range(ROWS)
+    )
@@ -0,0 +1,88 @@
+import time
+from logger_config import setup_logger
+from utils.cache import LRUCache
+from utils.db import get_streak, save_streaks
+from config import STREAK_CACHE_SIZE, STREAK_TTL_SECONDS
+
+logger = setup_logger()
+
+# --- СЕРИИ ИГРОКОВ ---
+# Серия проигрышей (user_id, guild_id) для жалости и шанса поражения в
+# играх. В памяти — LRU с TTL: запись, к которой не обращались дольше
+# STREAK_TTL_SECONDS, вытесняется при очередном сбросе. Изменения копятся
+# в _dirty и раз в несколько секунд пишутся в таблицу streaks одной
+# транзакцией; при первом обращении после рестарта серия читается из БД.
+
+class StreakStore:
+    def __init__(self, max_size=10000, ttl=3600):
+        self.ttl = ttl
+        self._cache = LRUCache(max_size)
+        self._dirty = {}
+        self._flushing = {}
+
+    def _peek(self, key):
+        # Несохранённые значения важнее кэша: его запись могла быть вытеснена
+        if key in self._dirty:
+            return self._dirty[key]
+        if key in self._flushing:
+            return self._flushing[key]
+        entry = self._cache.get(key)
+        return entry[0] if entry is not None else None
+
+    async def get(self, user_id, guild_id):
+        key = (user_id, guild_id)
+        streak = self._peek(key)
+        if streak is None:
+            streak = await get_streak(user_id, guild_id)
+            # Пока шло чтение, серию могли изменить и даже уже сохранить:
+            # любое значение в памяти новее прочитанного из БД
+            newer = self._peek(key)
+            if newer is not None:
+                streak = newer
+        self._cache.put(key, (streak, time.monotonic()))
+        return streak
+
+    def set(self, user_id, guild_id, streak):
+        key = (user_id, guild_id)
+        self._cache.put(key, (streak, time.monotonic()))
+        self._dirty[key] = streak
+
+    def reset(self, user_id, guild_id):
+        self.set(user_id, guild_id, 0)
+
+    async def incr(self, user_id, guild_id):
+        # await только на загрузку; чтение и запись — без переключения задач,
+        # поэтому параллельные incr/reset одного игрока не теряются
+        streak = await self.get(user_id, guild_id)
+        current = self._peek((user_id, guild_id))
+        streak = (streak if current is None else current) + 1
+        self.set(user_id, guild_id, streak)
+        return streak
+
+    async def flush(self):
+        deadline = time.monotonic() - self.ttl
+        expired = self._cache.evict_while(lambda key, entry: entry[1] < deadline)
+
+        if not self._dirty:
+            return 0
+
+        pending = self._flushing = self._dirty
+        self._dirty = {}
+        try:
+            await save_streaks([(user_id, guild_id, streak) for (user_id, guild_id), streak in pending.items()])
+        except Exception as e:
+            # Вернуть в очередь то, что не перезаписали за время сброса
+            for key, streak in pending.items():
+                self._dirty.setdefault(key, streak)
+            logger.error(f"❌ [STREAKS] Ошибка сохранения серий: {e}")
+            return 0
+        finally:
+            self._flushing = {}
+
+        logger.debug(f"🔁 [STREAKS] Сохранено серий: {len(pending)}, вытеснено по TTL: {expired}")
+        return len(pending)
+
+    def stats(self):
+        return self._cache.stats() | {"dirty": len(self._dirty)}
+
+streak_store = StreakStore(STREAK_CACHE_SIZE, STREAK_TTL_SECONDS)